@@ -0,0 +1,181 @@
+"""
+Сравнение синхронных и асинхронных представлений ya_news под ASGI.
+
+Каждый режим запускается в отдельном процессе с временной базой.
+Приложение из yanews.asgi вызывается напрямую, без сети. Медленные
+клиенты моделируются задержкой перед отправкой запроса и при чтении
+ответа, медленная база — задержкой на каждый SQL-запрос. Оба режима
+проходят одни и те же проверки ETag и кеш страниц, а запись в кеш
+страниц отключена (NEWS_PAGE_CACHE_TIMEOUT=0), чтобы каждый запрос
+доходил до базы.
+
+Запуск из корня репозитория:
+    python benchmarks/async_views.py --clients 200 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from common import percentile, setup_django
+
+
+def seed(news_count, comment_count):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 20)
+        for index in range(news_count)
+    )
+    news = News.objects.first()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(comment_count)
+    )
+    return news.pk
+
+
+def add_db_latency(latency):
+    """Задержка на каждый запрос к базе, как у удалённого сервера БД."""
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(slow_query)
+
+    connection_created.connect(install, weak=False)
+    if connection.connection is not None:
+        connection.execute_wrappers.append(slow_query)
+
+
+async def request(application, path, client_delay):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    finished = asyncio.Event()
+    sent_body = False
+    status = None
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            await asyncio.sleep(client_delay)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            await asyncio.sleep(client_delay)
+            if not message.get('more_body'):
+                finished.set()
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    return status, time.perf_counter() - started
+
+
+async def drive(application, paths, clients, rounds, client_delay):
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(
+            request(application, paths[index % len(paths)], client_delay)
+            for index in range(clients)
+        ))
+        for status, latency in results:
+            errors += status != 200
+            latencies.append(latency)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def worker(args):
+    setup_django(
+        'ya_news',
+        temporary_database=True,
+        NEWS_ASYNC_VIEWS=args.mode == 'async',
+        NEWS_PAGE_CACHE_TIMEOUT=0,
+        DEBUG=False,
+    )
+    from django.core.asgi import get_asgi_application
+
+    news_id = seed(args.news, args.comments)
+    if args.db_latency_ms:
+        add_db_latency(args.db_latency_ms / 1000)
+    paths = ['/', f'/news/{news_id}/', f'/news/{news_id}/comments/']
+    application = get_asgi_application()
+    result = asyncio.run(drive(
+        application, paths, args.clients, args.rounds,
+        args.client_delay_ms / 1000,
+    ))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--client-delay-ms', type=float, default=50)
+    parser.add_argument('--db-latency-ms', type=float, default=2)
+    parser.add_argument('--news', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=100)
+    parser.add_argument('--mode', choices=('sync', 'async'))
+    args = parser.parse_args()
+
+    if args.mode:
+        return worker(args)
+    print(
+        f'{args.clients} одновременных клиентов, задержка клиента '
+        f'{args.client_delay_ms} мс, задержка базы {args.db_latency_ms} мс'
+    )
+    print(f'{"режим":>6} {"запросов/с":>11} {"p50, мс":>9} {"p95, мс":>9} '
+          f'{"p99, мс":>9} {"ошибок":>7}')
+    for mode in ('sync', 'async'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, *sys.argv[1:]],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f'{mode:>6} {result["rps"]:>11.1f} {result["p50_ms"]:>9.1f} '
+            f'{result["p95_ms"]:>9.1f} {result["p99_ms"]:>9.1f} '
+            f'{result["errors"]:>7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Сравнение проверки запрещённых слов: цикл по словарю и автомат.
+
+Запуск из корня репозитория:
+    python benchmarks/bad_words.py --sizes 10 100 1000 5000
+"""
+import argparse
+import random
+import timeit
+
+from common import setup_django
+
+setup_django('ya_news')
+
+from news.moderation import AhoCorasick  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=5, max_length=10):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def loop_find(words, text):
+    """Прежний способ из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument('--text-words', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    text = ' '.join(
+        random_word(rng, 2, 4) for _ in range(args.text_words)
+    )
+    print(f'Текст: {len(text)} символов, {args.repeat} проверок')
+    print(f'{"слов":>6} {"цикл, мкс":>12} {"автомат, мкс":>14} '
+          f'{"ускорение":>10} {"сборка, мс":>11}')
+    for size in args.sizes:
+        words = [random_word(rng) for _ in range(size)]
+        started = timeit.default_timer()
+        matcher = AhoCorasick(words)
+        build = timeit.default_timer() - started
+        assert matcher.find(text) == loop_find(words, text)
+        loop = timeit.timeit(
+            lambda: loop_find(words, text), number=args.repeat
+        )
+        automaton = timeit.timeit(
+            lambda: matcher.find(text.lower()), number=args.repeat
+        )
+        print(
+            f'{size:>6} {loop / args.repeat * 1e6:>12.1f} '
+            f'{automaton / args.repeat * 1e6:>14.1f} '
+            f'{loop / automaton:>9.1f}x {build * 1e3:>11.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Первые запросы нового рабочего процесса: без прогрева и с warm_up().
+
+Каждый запуск — отдельный процесс с временной базой проекта, как после
+перезапуска рабочего процесса. Процесс заполняет базу сценариями из
+routes.py, с --mode warm вызывает warmup.warm_up(), как wsgi.py и
+asgi.py, и по разу проходит все GET-сценарии: первый запрос к маршруту
+платит за импорт URLconf, загрузку и разбор шаблонов, второй — уже нет.
+Печатаются медианы по --runs запускам.
+
+Запуск из корня репозитория:
+    python benchmarks/cold_start.py ya_news --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from common import setup_django
+from routes import SEEDERS, USERS_ROUTES, make_clients
+
+
+def worker(args):
+    setup_django(
+        args.project,
+        temporary_database=True,
+        DEBUG=False,
+        ALLOWED_HOSTS=['testserver'],
+    )
+    users, routes = SEEDERS[args.project](1)
+    clients = make_clients(users)
+    started = time.perf_counter()
+    if args.mode == 'warm':
+        from yacore import warmup
+
+        warmup.warm_up()
+    warm_up = time.perf_counter() - started
+
+    from django.urls import reverse
+
+    first, second = [], []
+    for route in routes + USERS_ROUTES:
+        if route.method != 'get':
+            continue
+        client = clients[route.client]
+        for latencies in (first, second):
+            started = time.perf_counter()
+            client.get(reverse(route.name, args=route.args), route.query)
+            latencies.append(time.perf_counter() - started)
+    print(json.dumps({
+        'warm_up_ms': warm_up * 1000,
+        'first_total_ms': sum(first) * 1000,
+        'first_max_ms': max(first) * 1000,
+        'second_total_ms': sum(second) * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('project', choices=sorted(SEEDERS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--mode', choices=('cold', 'warm'))
+    args = parser.parse_args()
+
+    if args.mode:
+        return worker(args)
+    print(f'{"режим":>6} {"прогрев, мс":>12} {"первые, мс":>11} '
+          f'{"худший, мс":>11} {"повторные, мс":>14}')
+    for mode in ('cold', 'warm'):
+        results = [
+            json.loads(subprocess.run(
+                [sys.executable, __file__, args.project, '--mode', mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1])
+            for _ in range(args.runs)
+        ]
+        median = {
+            key: statistics.median(result[key] for result in results)
+            for key in results[0]
+        }
+        print(f'{mode:>6} {median["warm_up_ms"]:>12.1f} '
+              f'{median["first_total_ms"]:>11.1f} '
+              f'{median["first_max_ms"]:>11.1f} '
+              f'{median["second_total_ms"]:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
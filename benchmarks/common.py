@@ -0,0 +1,52 @@
+"""Общие помощники для скриптов замеров производительности."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup_django(
+        project, temporary_database=False, database=None, **overrides
+):
+    """
+    Подключает проект и настраивает Django перед замерами.
+
+    С temporary_database=True проект работает с новой базой во временном
+    каталоге, к которой применены миграции, чтобы не трогать рабочую.
+    Ключи database заменяют ключи DATABASES['default'], остальные
+    именованные аргументы переопределяют настройки проекта.
+    """
+    sys.path.insert(0, str(BASE_DIR / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', PROJECTS[project])
+    from django.conf import settings
+
+    if temporary_database:
+        database_dir = tempfile.mkdtemp(prefix=f'{project}-bench-')
+        settings.DATABASES['default']['NAME'] = (
+            Path(database_dir) / 'db.sqlite3'
+        )
+    settings.DATABASES['default'].update(database or {})
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    if temporary_database:
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+
+
+def percentile(values, share):
+    """Перцентиль отсортированного списка без интерполяции."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(share * (len(values) - 1))))
+    return values[index]
@@ -0,0 +1,89 @@
+"""
+Байты на выходе и цена по CPU для очистки HTML и gzip.
+
+Заполняет временную базу проекта сценариями из routes.py и получает
+HTML всех GET-страниц без HtmlMinifyMiddleware и CompressionMiddleware.
+Затем для каждой страницы считает размер исходного HTML, после
+WhitespaceMinifier, после gzip и после обоих, а также процессорное
+время рендера страницы, очистки и сжатия (среднее по --repeat).
+
+Запуск из корня репозитория:
+    python benchmarks/compression.py ya_news --scale 5
+"""
+import argparse
+import time
+
+from common import setup_django
+from routes import SEEDERS, USERS_ROUTES, make_clients
+
+
+def cpu_ms(function, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        function()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('project', choices=sorted(SEEDERS))
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django(
+        args.project,
+        temporary_database=True,
+        DEBUG=False,
+        ALLOWED_HOSTS=['testserver'],
+    )
+    from django.conf import settings
+    from django.urls import reverse
+    from django.utils.text import compress_string
+
+    from yacore.compression import WhitespaceMinifier
+
+    # Клиенты собирают цепочку middleware при первом запросе.
+    settings.MIDDLEWARE = [
+        name for name in settings.MIDDLEWARE
+        if name not in (
+            'yacore.compression.HtmlMinifyMiddleware',
+            'yacore.compression.CompressionMiddleware',
+        )
+    ]
+
+    users, routes = SEEDERS[args.project](args.scale)
+    clients = make_clients(users)
+    print(f'{"страница":<32} {"HTML, КБ":>9} {"очист.":>7} {"gzip":>6} '
+          f'{"оба":>6} {"рендер, мс":>11} {"очист., мс":>11} '
+          f'{"gzip, мс":>9}')
+    for route in routes + USERS_ROUTES:
+        if route.method != 'get':
+            continue
+        client = clients[route.client]
+        path = reverse(route.name, args=route.args)
+        response = client.get(path, route.query)
+        if not response.get('Content-Type', '').startswith('text/html'):
+            continue
+        html = response.content
+        minified = WhitespaceMinifier().feed(html)
+        sizes = [
+            len(html), len(minified),
+            len(compress_string(html)), len(compress_string(minified)),
+        ]
+        render = cpu_ms(lambda: client.get(path, route.query), args.repeat)
+        minify = cpu_ms(lambda: WhitespaceMinifier().feed(html), args.repeat)
+        compress = cpu_ms(
+            lambda: compress_string(minified, max_random_bytes=100),
+            args.repeat,
+        )
+        print(f'{route.label:<32} {sizes[0] / 1024:>9.1f} '
+              f'{sizes[1] / 1024:>7.1f} {sizes[2] / 1024:>6.1f} '
+              f'{sizes[3] / 1024:>6.1f} {render:>11.2f} {minify:>11.3f} '
+              f'{compress:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Создание заметок: по одной через форму против пакетного запроса.
+
+Оба способа проходят весь стек Django через тестовый клиент на
+временной базе ya_note. Все заметки получают одинаковый заголовок,
+так что каждая следующая требует подбора нового slug.
+
+Запуск из корня репозитория:
+    python benchmarks/notes_batch.py --notes 2000 --batch-size 500
+"""
+import argparse
+import time
+
+from common import setup_django
+
+setup_django(
+    'ya_note',
+    temporary_database=True,
+    DEBUG=False,
+    ALLOWED_HOSTS=['testserver'],
+)
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+
+def make_client(username):
+    client = Client()
+    client.force_login(get_user_model().objects.create(username=username))
+    return client
+
+
+def one_by_one(client, count, title):
+    url = reverse('notes:add')
+    for index in range(count):
+        response = client.post(
+            url, {'title': title, 'text': f'Текст {index}'}
+        )
+        assert response.status_code == 302, response.status_code
+
+
+def batched(client, count, title, batch_size):
+    url = reverse('notes:batch')
+    for start in range(0, count, batch_size):
+        operations = [
+            {'op': 'create', 'title': title, 'text': f'Текст {index}'}
+            for index in range(start, min(count, start + batch_size))
+        ]
+        response = client.post(
+            url, {'operations': operations}, content_type='application/json'
+        )
+        assert response.status_code == 200, response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f'{"способ":>10} {"заметок/с":>10}')
+    for label, run in (
+        ('по одной', lambda: one_by_one(
+            make_client('single'), args.notes, 'Заметка по одной'
+        )),
+        ('пакетом', lambda: batched(
+            make_client('batch'), args.notes, 'Заметка пакетом',
+            args.batch_size,
+        )),
+    ):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        print(f'{label:>10} {args.notes / elapsed:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
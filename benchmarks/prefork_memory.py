@@ -0,0 +1,188 @@
+"""
+Память рабочих процессов команды serve при разных способах запуска.
+
+    separate  — --workers отдельных серверов по одному процессу, каждый
+                импортирует приложение сам, как независимые экземпляры;
+    preload   — один главный процесс импортирует и прогревает приложение
+                и порождает рабочие процессы через fork();
+    freeze    — то же, но перед fork() вызывается gc.freeze(), и сборщик
+                мусора не трогает заголовки унаследованных объектов.
+
+Для каждого рабочего процесса читается /proc/PID/smaps_rollup: RSS,
+USS (только его собственные страницы) и PSS (RSS с разделяемыми
+страницами, поделёнными на число процессов). Замер делается сразу
+после старта и после --requests анонимных GET-запросов к маршрутам
+из routes.py. Нужен Linux.
+
+Запуск из корня репозитория:
+    python benchmarks/prefork_memory.py ya_news --workers 4
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from common import setup_django
+from routes import SEEDERS, USERS_ROUTES
+
+MODES = {
+    'separate': {'preload': False},
+    'preload': {'preload': True, 'freeze': False},
+    'freeze': {'preload': True, 'freeze': True},
+}
+
+
+def serve(args):
+    """Заполняет временную базу, печатает пути и запускает serve."""
+    setup_django(
+        args.project,
+        temporary_database=True,
+        DEBUG=False,
+        ALLOWED_HOSTS=['127.0.0.1'],
+    )
+    from django.core.management import call_command
+    from django.db import connections
+    from django.urls import reverse
+
+    _, routes = SEEDERS[args.project](1)
+    connections.close_all()
+    print(json.dumps([
+        reverse(route.name, args=route.args)
+        for route in routes + USERS_ROUTES
+        if route.method == 'get' and route.client == 'anonymous'
+    ]), flush=True)
+    call_command(
+        'serve', bind=f'127.0.0.1:{args.serve}', workers=args.workers,
+        max_requests=0, **MODES[args.mode],
+    )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    """PID дочерних процессов по полю ppid из /proc/PID/stat."""
+    result = []
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat.read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            result.append(int(stat.parent.name))
+    return result
+
+
+def memory(pid):
+    """RSS, USS и PSS процесса в МиБ."""
+    values = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines():
+        key, _, value = line.partition(':')
+        if value.strip().endswith('kB'):
+            values[key] = int(value.split()[0]) / 1024
+    return {
+        'rss': values['Rss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+        'pss': values['Pss'],
+    }
+
+
+def wait_ready(port, masters, workers):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1)
+            if sum(len(children(pid)) for pid in masters) == workers:
+                return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    sys.exit('Сервер не запустился.')
+
+
+def load(ports, paths, requests, concurrency):
+    def work(index):
+        for number in range(index, requests, concurrency):
+            port = ports[number % len(ports)]
+            path = paths[number % len(paths)]
+            urllib.request.urlopen(f'http://127.0.0.1:{port}{path}').read()
+
+    threads = [
+        threading.Thread(target=work, args=(index,))
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def snapshot(masters):
+    workers = [memory(pid) for master in masters for pid in children(master)]
+    return {
+        'rss': sum(item['rss'] for item in workers) / len(workers),
+        'uss': sum(item['uss'] for item in workers) / len(workers),
+        'pss': sum(item['pss'] for item in workers)
+        + sum(memory(pid)['pss'] for pid in masters),
+    }
+
+
+def measure(args, mode):
+    count = args.workers if mode == 'separate' else 1
+    workers = 1 if mode == 'separate' else args.workers
+    ports = [free_port() for _ in range(count)]
+    servers = [
+        subprocess.Popen(
+            [sys.executable, __file__, args.project, '--serve', str(port),
+             '--mode', mode, '--workers', str(workers)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        for port in ports
+    ]
+    try:
+        paths = json.loads(servers[0].stdout.readline())
+        masters = [server.pid for server in servers]
+        for port in ports:
+            wait_ready(port, masters, args.workers)
+        before = snapshot(masters)
+        load(ports, paths, args.requests, args.workers * 2)
+        return before, snapshot(masters)
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('project', choices=sorted(SEEDERS))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+    print(f'{args.workers} рабочих процессов, {args.requests} запросов; '
+          'RSS и USS — среднее на процесс, PSS — сумма с главными, МиБ')
+    print(f'{"режим":>9} {"":>8} {"RSS":>7} {"USS":>7} {"PSS":>7}')
+    for mode in MODES:
+        for stage, result in zip(('старт', 'нагрузка'), measure(args, mode)):
+            print(f'{mode:>9} {stage:>8} {result["rss"]:>7.1f} '
+                  f'{result["uss"]:>7.1f} {result["pss"]:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""
+Замер всех маршрутов проекта через Django в одном процессе.
+
+Заполняет временную базу проекта данными в масштабе --scale и
+прогоняет каждый маршрут из news/urls.py или notes/urls.py, а также
+маршруты users, через тестовый клиент: запрос проходит все middleware
+и WSGI-обработчик, но без сети. Маршрут, для которого не описан
+сценарий, считается ошибкой, чтобы новые страницы не выпадали из замеров.
+
+Для каждого сценария печатаются p50/p95/p99, запросы в секунду и число
+SQL-запросов в установившемся режиме. С --baseline результаты
+сравниваются с сохранённым JSON: рост p95 больше чем на --threshold или
+любое увеличение числа SQL-запросов считается регрессией, и скрипт
+завершается с кодом 1. Базовые значения снимаются на той же машине:
+    python benchmarks/routes.py ya_news --save-baseline PATH
+
+Запуск из корня репозитория:
+    python benchmarks/routes.py ya_note --requests 200 --concurrency 4
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from common import percentile, setup_django
+
+NAMESPACES = {
+    'ya_news': ('news', 'users'),
+    'ya_note': ('notes', 'users'),
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    """Сценарий запроса к маршруту от имени одного из клиентов."""
+
+    name: str
+    client: str = 'anonymous'
+    args: tuple = ()
+    method: str = 'get'
+    query: dict = field(default_factory=dict)
+    data: dict = field(default_factory=dict)
+    json: bool = False
+
+    @property
+    def label(self):
+        return f'{self.method.upper()} {self.name} ({self.client})'
+
+
+def seed_news(scale):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    User = get_user_model()
+    users = {
+        'author': User.objects.create(username='author'),
+        'reader': User.objects.create(username='reader'),
+        'staff': User.objects.create(username='staff', is_staff=True),
+    }
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 30)
+        for index in range(100 * scale)
+    )
+    news = News.objects.first()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=users['author'], text=f'Комментарий {i}')
+        for i in range(50 * scale)
+    )
+    comment = Comment.objects.filter(news=news).first()
+    routes = [
+        Route('news:home'),
+        Route('news:home', 'reader'),
+        Route('news:detail', args=(news.pk,)),
+        Route('news:detail', 'reader', args=(news.pk,)),
+        Route(
+            'news:detail', 'reader', args=(news.pk,), method='post',
+            data={'text': 'Новый комментарий'},
+        ),
+        Route('news:comments', args=(news.pk,)),
+        Route('news:edit', 'author', args=(comment.pk,)),
+        Route('news:delete', 'author', args=(comment.pk,)),
+        Route('news:cache_stats', 'staff'),
+        Route('news:search', query={'q': 'новость'}),
+        Route('news:export', 'staff'),
+        Route('news:rss'),
+        Route('news:atom'),
+    ]
+    return users, routes
+
+
+def seed_notes(scale):
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+
+    User = get_user_model()
+    users = {
+        'author': User.objects.create(username='author'),
+        'reader': User.objects.create(username='reader'),
+    }
+    Note.objects.bulk_create(
+        Note(
+            title=f'Заметка {index}',
+            text='Текст заметки. ' * 30,
+            slug=f'note-{index}',
+            author=users['author'],
+        )
+        for index in range(1000 * scale)
+    )
+    note = Note.objects.filter(author=users['author']).first()
+    routes = [
+        Route('notes:home'),
+        Route('notes:add', 'author'),
+        Route(
+            'notes:add', 'author', method='post',
+            data={'title': 'Новая заметка', 'text': 'Текст'},
+        ),
+        Route('notes:edit', 'author', args=(note.slug,)),
+        Route('notes:detail', 'author', args=(note.slug,)),
+        Route('notes:delete', 'author', args=(note.slug,)),
+        Route('notes:list', 'author'),
+        Route(
+            'notes:batch', 'author', method='post', json=True,
+            data={'operations': [
+                {'op': 'create', 'title': 'Пакет', 'text': 'Текст'}
+            ] * 10},
+        ),
+        Route('notes:search', 'author', query={'q': 'заметки'}),
+        Route('notes:success', 'author'),
+    ]
+    return users, routes
+
+
+SEEDERS = {
+    'ya_news': seed_news,
+    'ya_note': seed_notes,
+}
+
+USERS_ROUTES = [
+    Route('users:login'),
+    Route('users:logout', method='post'),
+    Route('users:signup'),
+]
+
+
+def url_names(namespaces):
+    """Имена всех маршрутов проекта в указанных пространствах имён."""
+    from django.urls import URLPattern, URLResolver, get_resolver
+
+    names = set()
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, pattern.namespace or namespace)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                if namespace in namespaces:
+                    names.add(f'{namespace}:{pattern.name}')
+
+    walk(get_resolver().url_patterns, None)
+    return names
+
+
+def make_clients(users):
+    from django.test import Client
+
+    clients = {'anonymous': Client()}
+    for name, user in users.items():
+        clients[name] = Client()
+        clients[name].force_login(user)
+    return clients
+
+
+def send(client, route, path):
+    if route.method == 'get':
+        response = client.get(path, route.query)
+    elif route.json:
+        response = client.post(
+            path, route.data, content_type='application/json'
+        )
+    else:
+        response = client.post(path, route.data)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def count_queries(client, route, path):
+    """SQL-запросы повторного запроса, когда кеши уже прогреты."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    send(client, route, path)
+    with CaptureQueriesContext(connection) as context:
+        status = send(client, route, path)
+    return status, len(context.captured_queries)
+
+
+def measure(route, path, clients, requests, concurrency):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def work(client, count):
+        nonlocal errors
+        for _ in range(count):
+            started = time.perf_counter()
+            status = send(client, route, path)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += status >= 400
+
+    threads = [
+        threading.Thread(target=work, args=(
+            clients[index][route.client],
+            requests // concurrency + (index < requests % concurrency),
+        ))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': errors,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно сохранённых результатов."""
+    regressions = []
+    for label, result in results.items():
+        if label not in baseline:
+            continue
+        before = baseline[label]
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{label}: SQL-запросов {before["queries"]} -> '
+                f'{result["queries"]}'
+            )
+        if result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{label}: p95 {before["p95_ms"]:.1f} -> '
+                f'{result["p95_ms"]:.1f} мс'
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('project', choices=sorted(SEEDERS))
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument('--save-baseline', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    setup_django(
+        args.project,
+        temporary_database=True,
+        DEBUG=False,
+        ALLOWED_HOSTS=['testserver'],
+    )
+    from django.urls import reverse
+
+    users, routes = SEEDERS[args.project](args.scale)
+    routes += USERS_ROUTES
+    missing = url_names(NAMESPACES[args.project]) - {
+        route.name for route in routes
+    }
+    if missing:
+        sys.exit(f'Нет сценариев для маршрутов: {", ".join(sorted(missing))}')
+    clients = [make_clients(users) for _ in range(args.concurrency)]
+
+    print(f'{"сценарий":<40} {"p50, мс":>8} {"p95, мс":>8} '
+          f'{"p99, мс":>8} {"запр./с":>8} {"SQL":>4} {"ошибок":>6}')
+    results = {}
+    for route in routes:
+        path = reverse(route.name, args=route.args)
+        status, queries = count_queries(clients[0][route.client], route, path)
+        result = measure(
+            route, path, clients, args.requests, args.concurrency
+        )
+        result['queries'] = queries
+        result['errors'] += status >= 400
+        results[route.label] = result
+        print(f'{route.label:<40} {result["p50_ms"]:>8.1f} '
+              f'{result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+              f'{result["rps"]:>8.0f} {queries:>4} {result["errors"]:>6}')
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2) + '\n'
+        )
+    failures = [
+        f'{label}: ошибок {result["errors"]}'
+        for label, result in results.items() if result['errors']
+    ]
+    if args.baseline:
+        failures += compare(
+            results, json.loads(args.baseline.read_text()), args.threshold
+        )
+    if failures:
+        print('\n'.join(['', 'Регрессии:', *failures]))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Поиск по новостям: FTS5 против icontains.
+
+Заполняет временную базу ya_news случайными новостями и сравнивает
+время поиска редкого и частого слова. Строк по умолчанию миллион;
+для быстрой проверки передайте --rows поменьше.
+
+Запуск из корня репозитория:
+    python benchmarks/search.py --rows 1000000
+"""
+import argparse
+import random
+import time
+
+from common import setup_django
+
+setup_django('ya_news', temporary_database=True, DEBUG=False)
+
+from django.db.models import Q  # noqa: E402
+
+from news.models import News  # noqa: E402
+from yacore.search import fts_search  # noqa: E402
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшэюя'
+
+
+def make_vocabulary(rng, size):
+    return [
+        ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 9)))
+        for _ in range(size)
+    ]
+
+
+def seed(rows, vocabulary, rng, batch_size=5000):
+    started = time.perf_counter()
+    # Слова выбираются по закону Ципфа: первые в словаре встречаются
+    # часто, последние — редко.
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for offset in range(0, rows, batch_size):
+        count = min(batch_size, rows - offset)
+        words = rng.choices(vocabulary, weights, k=count * 32)
+        News.objects.bulk_create(
+            News(
+                title=' '.join(words[index * 32:index * 32 + 4]),
+                text=' '.join(words[index * 32 + 4:(index + 1) * 32]),
+            )
+            for index in range(count)
+        )
+    return time.perf_counter() - started
+
+
+def measure(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    elapsed = seed(args.rows, vocabulary, rng)
+    print(f'Заполнено {args.rows} новостей за {elapsed:.1f} с '
+          f'(вместе с индексом FTS5)')
+    print(f'{"слово":>8} {"icontains, мс":>14} {"найдено":>8} '
+          f'{"FTS5, мс":>9} {"найдено":>8}')
+    for label, word in (
+        ('частое', vocabulary[0]),
+        ('редкое', vocabulary[-1]),
+        ('нет', 'отсутствующееслово'),
+    ):
+        icontains_ms, icontains_found = measure(
+            lambda: list(News.objects.filter(
+                Q(title__icontains=word) | Q(text__icontains=word)
+            )[:args.limit]),
+            args.repeat,
+        )
+        fts_ms, fts_found = measure(
+            lambda: fts_search(
+                News.objects.all(), 'news_news_fts', word, args.limit
+            ),
+            args.repeat,
+        )
+        print(f'{label:>8} {icontains_ms:>14.1f} {icontains_found:>8} '
+              f'{fts_ms:>9.1f} {fts_found:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Перезапуск рабочих процессов serve по --max-requests целиком.
+
+Для каждого значения --max-requests запускает serve в отдельном
+процессе с временной базой и кешем, как prefork_memory.py, и делает
+--requests анонимных GET-запросов к маршрутам из routes.py в
+--concurrency потоков. Печатает, сколько рабочих процессов удалось
+увидеть в /proc, число ошибок и перцентили задержки: так видна цена
+частого перезапуска. Любой ответ, кроме 200, или отсутствие новых
+рабочих процессов при ненулевом --max-requests — ошибка, и скрипт
+завершается с кодом 1. Нужен Linux.
+
+Запуск из корня репозитория:
+    python benchmarks/serve_recycling.py ya_news --max-requests 0 10 1
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from common import percentile, setup_django
+from prefork_memory import children, free_port, wait_ready
+from routes import SEEDERS, USERS_ROUTES
+
+
+def serve(args):
+    """Заполняет временную базу, печатает пути и запускает serve."""
+    setup_django(
+        args.project,
+        temporary_database=True,
+        DEBUG=False,
+        ALLOWED_HOSTS=['127.0.0.1'],
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.mkdtemp(prefix='serve-cache-'),
+        }},
+    )
+    from django.core.management import call_command
+    from django.db import connections
+    from django.urls import reverse
+
+    _, routes = SEEDERS[args.project](1)
+    connections.close_all()
+    print(json.dumps([
+        reverse(route.name, args=route.args)
+        for route in routes + USERS_ROUTES
+        if route.method == 'get' and route.client == 'anonymous'
+    ]), flush=True)
+    call_command(
+        'serve', bind=f'127.0.0.1:{args.serve}', workers=args.workers,
+        max_requests=args.max_requests[0], max_requests_jitter=0,
+    )
+
+
+def load(port, paths, requests, concurrency):
+    """Задержки успешных запросов в мс и число ошибок."""
+    latencies, errors = [], []
+
+    def work(index):
+        for number in range(index, requests, concurrency):
+            url = f'http://127.0.0.1:{port}{paths[number % len(paths)]}'
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=10) as response:
+                    response.read()
+            except (urllib.error.URLError, ConnectionError) as error:
+                errors.append(error)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [
+        threading.Thread(target=work, args=(index,))
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), len(errors)
+
+
+def watch(master, seen, done):
+    """Собирает PID рабочих процессов, пока идёт нагрузка."""
+    while not done.is_set():
+        seen.update(children(master))
+        time.sleep(0.005)
+
+
+def measure(args, max_requests):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, __file__, args.project, '--serve', str(port),
+         '--workers', str(args.workers), '--max-requests', str(max_requests)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        paths = json.loads(server.stdout.readline())
+        wait_ready(port, [server.pid], args.workers)
+        seen, done = set(), threading.Event()
+        watcher = threading.Thread(target=watch, args=(server.pid, seen, done))
+        watcher.start()
+        started = time.perf_counter()
+        latencies, errors = load(
+            port, paths, args.requests, args.concurrency
+        )
+        elapsed = time.perf_counter() - started
+        done.set()
+        watcher.join()
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'workers': len(seen),
+        'errors': errors,
+        'rps': args.requests / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('project', choices=sorted(SEEDERS))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument(
+        '--max-requests', type=int, nargs='+', default=[0, 10, 1]
+    )
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+    print(f'{"max-requests":>12} {"процессов":>10} {"ошибок":>7} '
+          f'{"запр./с":>8} {"p50, мс":>8} {"p99, мс":>8}')
+    failed = False
+    for max_requests in args.max_requests:
+        result = measure(args, max_requests)
+        print(f'{max_requests:>12} {result["workers"]:>10} '
+              f'{result["errors"]:>7} {result["rps"]:>8.0f} '
+              f'{result["p50"]:>8.1f} {result["p99"]:>8.1f}')
+        failed |= bool(result['errors']) or bool(
+            max_requests and result['workers'] <= args.workers
+        )
+    if failed:
+        sys.exit('Есть ошибки или рабочие процессы не перезапускались.')
+
+
+if __name__ == '__main__':
+    main()
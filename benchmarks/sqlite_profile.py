@@ -0,0 +1,158 @@
+"""
+Конкурентные чтение и запись в SQLite: стандартные настройки против
+профиля из settings.py (WAL, прагмы, постоянные соединения).
+
+Каждый профиль запускается в отдельном процессе с временной файловой
+базой ya_news. Читатели открывают ленту и комментарии новости,
+писатели добавляют комментарии в транзакции. После каждой операции,
+как в конце запроса, вызывается close_old_connections(): без
+CONN_MAX_AGE соединение закрывается и следующая операция открывает
+новое.
+
+Запуск из корня репозитория:
+    python benchmarks/sqlite_profile.py --readers 8 --writers 4
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from common import setup_django
+
+STOCK_DATABASE = {
+    'OPTIONS': {},
+    'CONN_MAX_AGE': 0,
+    'CONN_HEALTH_CHECKS': False,
+}
+
+
+def seed(news_count, comment_count):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 20)
+        for index in range(news_count)
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(
+            news_id=random.choice(news_ids),
+            author=author,
+            text=f'Комментарий {index}',
+        )
+        for index in range(comment_count)
+    )
+    return author, news_ids
+
+
+def read(news_ids):
+    from news.models import Comment, News
+
+    list(News.objects.all()[:10])
+    list(
+        Comment.objects.filter(news_id=random.choice(news_ids))
+        .select_related('author')[:20]
+    )
+
+
+def write(author, news_ids):
+    from django.db import transaction
+
+    from news.models import Comment, News
+
+    news = News.objects.get(pk=random.choice(news_ids))
+    with transaction.atomic():
+        Comment.objects.create(news=news, author=author, text='Новый')
+
+
+def run(operation, deadline, stats):
+    from django.db import OperationalError, close_old_connections
+
+    while time.perf_counter() < deadline:
+        try:
+            operation()
+            stats['done'] += 1
+        except OperationalError:
+            stats['errors'] += 1
+        finally:
+            close_old_connections()
+
+
+def worker(args):
+    setup_django(
+        'ya_news',
+        temporary_database=True,
+        database=STOCK_DATABASE if args.profile == 'stock' else None,
+        DEBUG=False,
+    )
+    from django.db import connection
+
+    author, news_ids = seed(args.news, args.comments)
+    connection.close()
+    stats = {
+        kind: [{'done': 0, 'errors': 0} for _ in range(count)]
+        for kind, count in (('read', args.readers), ('write', args.writers))
+    }
+    operations = {
+        'read': lambda: read(news_ids),
+        'write': lambda: write(author, news_ids),
+    }
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(
+            target=run, args=(operations[kind], deadline, thread_stats)
+        )
+        for kind, items in stats.items()
+        for thread_stats in items
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps({
+        kind: {
+            'per_second': sum(item['done'] for item in items) / args.seconds,
+            'errors': sum(item['errors'] for item in items),
+        }
+        for kind, items in stats.items()
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--profile', choices=('stock', 'tuned'))
+    args = parser.parse_args()
+
+    if args.profile:
+        return worker(args)
+    print(f'{args.readers} читателей, {args.writers} писателей, '
+          f'{args.seconds} с')
+    print(f'{"профиль":>8} {"чтений/с":>9} {"ошибок":>7} '
+          f'{"записей/с":>10} {"ошибок":>7}')
+    for profile in ('stock', 'tuned'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile, *sys.argv[1:]],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f'{profile:>8} {result["read"]["per_second"]:>9.0f} '
+            f'{result["read"]["errors"]:>7} '
+            f'{result["write"]["per_second"]:>10.0f} '
+            f'{result["write"]["errors"]:>7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
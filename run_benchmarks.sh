@@ -0,0 +1,18 @@
+#!/bin/bash
+# Замеры всех маршрутов обоих проектов и сравнение с сохранёнными
+# результатами из benchmarks/baselines. Аргументы передаются в
+# benchmarks/routes.py, например: bash run_benchmarks.sh --concurrency 4
+# Чтобы обновить базовые значения: bash run_benchmarks.sh --update
+
+cd "$(dirname "$0")"
+status=0
+for project in ya_news ya_note; do
+    baseline="benchmarks/baselines/$project.json"
+    if [[ "$1" == "--update" ]]; then
+        python benchmarks/routes.py "$project" --save-baseline "$baseline" "${@:2}" || status=$?
+    else
+        python benchmarks/routes.py "$project" --baseline "$baseline" "$@" || status=$?
+    fi
+    echo
+done
+exit $status
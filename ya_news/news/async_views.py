@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from django.template.response import TemplateResponse
+from django.utils.decorators import method_decorator
+from django.views import generic
+
+from .cache import (
+    LIST_VERSION,
+    AsyncAnonymousPageCacheMixin,
+    get_news_version,
+    get_versions,
+    news_version,
+)
+from .conditional import conditional_page, news_etag, news_list_etag
+from .forms import CommentForm
+from .models import News
+from .views import NewsComment, get_comments_paginator, get_news_paginator
+
+
+@method_decorator(conditional_page(news_list_etag), name='dispatch')
+class AsyncNewsList(AsyncAnonymousPageCacheMixin, generic.View):
+    """
+    Список новостей на асинхронном ORM.
+
+    Под ASGI запрос не занимает поток, пока ждёт базу. Подключаются
+    вместо синхронных представлений настройкой NEWS_ASYNC_VIEWS и
+    отвечают так же: с кешем страниц для анонимных читателей и
+    условными GET-запросами по ETag.
+    """
+    page_cache_versions = (LIST_VERSION,)
+    page_cache_params = ('cursor',)
+
+    async def get(self, request, *args, **kwargs):
+        page = await get_news_paginator().aget_page(request.GET.get('cursor'))
+        versions = await sync_to_async(get_versions)(
+            *(news_version(news.pk) for news in page.object_list)
+        )
+        for news in page.object_list:
+            news.cache_version = versions[news_version(news.pk)]
+        return TemplateResponse(request, 'news/home.html', {
+            'object_list': page.object_list,
+            'page': page,
+        })
+
+
+@method_decorator(conditional_page(news_etag), name='dispatch')
+class AsyncNewsDetail(AsyncAnonymousPageCacheMixin, generic.View):
+    """Новость с первой страницей комментариев на асинхронном ORM."""
+
+    def get_page_cache_versions(self):
+        return (news_version(self.kwargs['pk']),)
+
+    async def get(self, request, pk, *args, **kwargs):
+        news = await aget_object_or_404(News, pk=pk)
+        comments_page = await get_comments_paginator(pk).aget_page()
+        context = {
+            'object': news,
+            'news': news,
+            'comments': comments_page.object_list,
+            'comments_page': comments_page,
+            'cache_version': await sync_to_async(get_news_version)(pk),
+        }
+        user = await request.auser()
+        if user.is_authenticated:
+            context['form'] = CommentForm()
+        return TemplateResponse(request, 'news/detail.html', context)
+
+
+class AsyncNewsDetailView(generic.View):
+    """Страница новости: GET асинхронный, комментарий — через NewsComment."""
+
+    async def get(self, request, *args, **kwargs):
+        view = AsyncNewsDetail.as_view()
+        return await view(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
+
+
+@method_decorator(conditional_page(news_etag), name='dispatch')
+class AsyncCommentList(AsyncAnonymousPageCacheMixin, generic.View):
+    """
+    Следующая страница комментариев на асинхронном ORM.
+
+    Для несуществующей новости news_etag отвечает 404, как у CommentList.
+    """
+    page_cache_params = ('cursor',)
+
+    def get_page_cache_versions(self):
+        return (news_version(self.kwargs['pk']),)
+
+    async def get(self, request, pk, *args, **kwargs):
+        page = await get_comments_paginator(pk).aget_page(
+            request.GET.get('cursor')
+        )
+        return TemplateResponse(request, 'news/comments.html', {
+            'comments': page.object_list,
+            'comments_page': page,
+            'news_id': pk,
+            'cache_version': await sync_to_async(get_news_version)(pk),
+        })
@@ -0,0 +1,190 @@
+import hashlib
+import time
+from functools import partial
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from yacore.compression import minify_response
+
+LIST_VERSION = 'list'
+FEED_VERSION = 'feed'
+PAGE_CACHE_HITS = 'news:page-cache:hits'
+PAGE_CACHE_MISSES = 'news:page-cache:misses'
+
+
+def news_version(pk):
+    """Имя версии отдельной новости вместе с её комментариями."""
+    return f'news-{pk}'
+
+
+def _version_key(name):
+    return f'news:version:{name}'
+
+
+def _initial_version():
+    """
+    Начальная версия — текущее время в микросекундах.
+
+    Если версия вытеснена из кеша, новая не совпадёт ни с одной прежней,
+    и устаревшие записи не будут выданы.
+    """
+    return time.time_ns() // 1000
+
+
+def get_versions(*names):
+    """Текущие версии по именам одним обращением к кешу."""
+    keys = {name: _version_key(name) for name in names}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for name, key in keys.items():
+        if key not in stored:
+            cache.add(key, _initial_version(), timeout=None)
+            stored[key] = cache.get(key)
+        versions[name] = stored[key]
+    return versions
+
+
+def get_news_version(pk):
+    """Версия новости для ключей кеша фрагментов шаблона."""
+    name = news_version(pk)
+    return get_versions(name)[name]
+
+
+def _bump(names):
+    keys = [_version_key(name) for name in names]
+    stored = cache.get_many(keys)
+    now = _initial_version()
+    cache.set_many(
+        {key: max(now, stored.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def bump_versions(*names):
+    """
+    Меняет версии, делая недействительными зависящие от них записи.
+
+    Внутри транзакции версии меняются после её фиксации: иначе
+    параллельный запрос успел бы закешировать старые строки под новой
+    версией. Новая версия — текущее время, но больше прежней: у общего
+    кеша нет атомарного incr, и процессы, одновременно увеличившие одну
+    версию, всё равно запишут разные значения.
+    """
+    if names:
+        transaction.on_commit(partial(_bump, names))
+
+
+def _increment(key):
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def get_page_cache_stats():
+    """Счётчики попаданий и промахов кеша страниц."""
+    stats = cache.get_many((PAGE_CACHE_HITS, PAGE_CACHE_MISSES))
+    hits = stats.get(PAGE_CACHE_HITS, 0)
+    misses = stats.get(PAGE_CACHE_MISSES, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+class PageCacheMixin:
+    """Ключи и записи кеша страниц; dispatch() задают наследники."""
+
+    page_cache_versions = ()
+    page_cache_params = ()
+
+    def get_page_cache_versions(self):
+        return self.page_cache_versions
+
+    def get_page_cache_key(self):
+        versions = get_versions(*self.get_page_cache_versions())
+        query = urlencode([
+            (name, self.request.GET[name])
+            for name in self.page_cache_params
+            if name in self.request.GET
+        ])
+        path = hashlib.md5(
+            f'{self.request.path}?{query}'.encode(), usedforsecurity=False
+        ).hexdigest()
+        version = '.'.join(str(value) for value in versions.values())
+        return f'news:page:{self.__class__.__name__}:{version}:{path}'
+
+    def get_cached_page(self, key):
+        """Страница из кеша или None; попадания и промахи считаются."""
+        response = cache.get(key)
+        _increment(PAGE_CACHE_MISSES if response is None else PAGE_CACHE_HITS)
+        return response
+
+    def cache_page(self, key, response):
+        """Сохраняет удачный ответ, ответ по шаблону — после рендера."""
+        if response.status_code == 200:
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(
+                    lambda rendered: self.store_page(key, rendered)
+                )
+            else:
+                self.store_page(key, response)
+        return response
+
+    def store_page(self, key, response):
+        """Сохраняет страницу в кеш уже очищенной от отступов."""
+        if response.get('Content-Type', '').startswith('text/html'):
+            minify_response(response)
+        cache.set(key, response, settings.NEWS_PAGE_CACHE_TIMEOUT)
+
+
+class AnonymousPageCacheMixin(PageCacheMixin):
+    """
+    Кеширует страницу целиком для анонимных GET-запросов.
+
+    Ключ включает версии, от которых зависит страница: сигналы меняют их
+    при сохранении и удалении новостей и комментариев. Из строки запроса
+    в ключ попадают только параметры page_cache_params, которые читает
+    представление: произвольные параметры не плодят записи в кеше.
+    Авторизованные пользователи всегда получают свежую страницу
+    со своими ссылками и формой.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        response = self.get_cached_page(key)
+        if response is None:
+            response = self.cache_page(
+                key, super().dispatch(request, *args, **kwargs)
+            )
+        return response
+
+
+class AsyncAnonymousPageCacheMixin(PageCacheMixin):
+    """
+    AnonymousPageCacheMixin для представлений с async-обработчиками.
+
+    Пользователь берётся через request.auser(), а обращения к кешу
+    выполняются в потоке через sync_to_async.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if request.method != 'GET' or user.is_authenticated:
+            return await super().dispatch(request, *args, **kwargs)
+        key = await sync_to_async(self.get_page_cache_key)()
+        response = await sync_to_async(self.get_cached_page)(key)
+        if response is None:
+            response = await sync_to_async(self.cache_page)(
+                key, await super().dispatch(request, *args, **kwargs)
+            )
+        return response
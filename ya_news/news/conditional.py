@@ -0,0 +1,108 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache import LIST_VERSION, get_news_version, get_versions
+from .models import Comment, News
+
+
+def _user_key(request):
+    """Валидаторы авторизованных пользователей различаются по id."""
+    user = request.user
+    return f'user-{user.pk}' if user.is_authenticated else 'anonymous'
+
+
+def _make_etag(request, *parts):
+    raw = ':'.join(
+        str(part) for part in (*parts, request.get_full_path())
+    )
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _news_state(pk):
+    """Дата новости, число и время последнего комментария одним запросом."""
+    last_comment = Comment.objects.filter(
+        news=OuterRef('pk')
+    ).order_by('-created').values('created')[:1]
+    return News.objects.filter(pk=pk).annotate(
+        last_comment=Subquery(last_comment)
+    ).values('date', 'comment_count', 'last_comment').first()
+
+
+def news_etag(request, pk, **kwargs):
+    """
+    Валидатор страницы новости и её комментариев.
+
+    Last-Modified не отдаётся: правка заголовка, текста или комментария
+    и удаление комментария не меняют ни дату новости, ни время последнего
+    комментария. Такие правки меняет версия новости из кеша.
+
+    Запрос состояния заодно проверяет, что новость есть: для
+    несуществующей страница новости и подгрузка её комментариев
+    отвечают 404 без лишнего запроса.
+    """
+    state = _news_state(pk)
+    if state is None:
+        raise Http404('Новость не найдена.')
+    return _make_etag(
+        request,
+        pk,
+        state['date'],
+        state['comment_count'],
+        state['last_comment'],
+        get_news_version(pk),
+        _user_key(request),
+    )
+
+
+def news_list_etag(request, *args, **kwargs):
+    """Валидатор ленты по версии, которую меняют сигналы при правках."""
+    return _make_etag(
+        request, get_versions(LIST_VERSION)[LIST_VERSION], _user_key(request)
+    )
+
+
+def conditional_page(etag_func):
+    """
+    Условный GET: 304 без рендера страницы, если у клиента она свежая.
+
+    Страницы авторизованных пользователей помечаются как private, чтобы
+    их не сохранял общий прокси. Async-представление получает ту же
+    обработку: валидатор обращается к базе и вызывается в потоке.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_conditional(etag_func, view)
+        conditional_view = condition(etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            return _patch_headers(response, request.user)
+        return wrapper
+    return decorator
+
+
+def _async_conditional(etag_func, view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Валидатор читает request.user синхронно: подставляем уже
+        # загруженного пользователя, чтобы не читать сессию второй раз.
+        request.user = await request.auser()
+        etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+        conditional_view = condition(lambda *args, **kwargs: etag)(view)
+        response = await conditional_view(request, *args, **kwargs)
+        return _patch_headers(response, request.user)
+    return wrapper
+
+
+def _patch_headers(response, user):
+    patch_vary_headers(response, ('Cookie',))
+    if user.is_authenticated:
+        patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,55 @@
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, News
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'author__username', 'text', 'created')
+
+
+def iter_news_records(chunk_size=500):
+    """
+    Новости вместе с комментариями по одной, в порядке id.
+
+    Новости читаются серверным курсором порциями по chunk_size,
+    комментарии каждой порции — одним запросом, поэтому память
+    не зависит от размера таблиц.
+    """
+    news_iterator = News.objects.order_by('pk').values(
+        *NEWS_FIELDS
+    ).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(news_iterator, chunk_size)):
+        comments = defaultdict(list)
+        for comment in Comment.objects.filter(
+            news_id__in=[news['id'] for news in chunk]
+        ).order_by('news_id', 'created', 'id').values(
+            'news_id', *COMMENT_FIELDS
+        ).iterator(chunk_size=chunk_size):
+            news_id = comment.pop('news_id')
+            comment['author'] = comment.pop('author__username')
+            comments[news_id].append(comment)
+        for news in chunk:
+            news['comments'] = comments.pop(news['id'], [])
+            yield news
+
+
+def iter_ndjson(chunk_size=500):
+    """Строки NDJSON для выгрузки новостей."""
+    for record in iter_news_records(chunk_size):
+        yield json.dumps(
+            record, ensure_ascii=False, cls=DjangoJSONEncoder
+        ).encode() + b'\n'
+
+
+def gzip_stream(chunks):
+    """Сжимает поток байтов в gzip на лету."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,72 @@
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .cache import FEED_VERSION, get_versions
+from .models import News
+
+
+class LatestNewsFeed(Feed):
+    """
+    RSS-лента последних новостей.
+
+    Готовый ответ хранится в кеше под версией ленты, которую сигналы
+    меняют только при сохранении и удалении новостей, поэтому лента
+    собирается заново лишь после их изменения. Last-Modified — время
+    сборки закешированного ответа, так что опросы без изменений
+    получают 304 и по ETag, и по If-Modified-Since.
+    """
+
+    title = 'YaNews'
+    link = reverse_lazy('news:home')
+    description = 'Последние новости YaNews.'
+
+    def __call__(self, request, *args, **kwargs):
+        version = get_versions(FEED_VERSION)[FEED_VERSION]
+        raw_key = f'{self.__class__.__name__}:{request.get_host()}:{version}'
+        key = 'news:feed:' + hashlib.md5(
+            raw_key.encode(), usedforsecurity=False
+        ).hexdigest()
+        response = cache.get(key)
+        if response is None:
+            response = super().__call__(request, *args, **kwargs)
+            response['ETag'] = quote_etag(key)
+            response['Last-Modified'] = http_date()
+            cache.set(key, response, timeout=None)
+        patch_cache_control(response, public=True)
+        return get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=parse_http_date_safe(response['Last-Modified']),
+            response=response,
+        )
+
+    def items(self):
+        return News.objects.all()[:settings.NEWS_COUNT_IN_FEED]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('news:detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, time.min))
+
+
+class AtomLatestNewsFeed(LatestNewsFeed):
+    """Atom-лента последних новостей."""
+
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from news.export import gzip_stream, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает новости с комментариями в NDJSON потоком.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки или - для stdout.',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать выгрузку в gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько новостей читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_ndjson(options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_stream(chunks)
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+            output.writelines(chunks)
+            output.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            output.writelines(chunks)
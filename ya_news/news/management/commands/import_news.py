@@ -0,0 +1,190 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.cache import (
+    FEED_VERSION, LIST_VERSION, bump_versions, news_version
+)
+from news.models import News
+
+FORMATS = ('jsonl', 'csv')
+UPDATE_FIELDS = ('title', 'text', 'date')
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает новости из JSONL или CSV (файла или stdin) пачками '
+        'через bulk_create.'
+    )
+    stealth_options = ('stdin',)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл с новостями (.jsonl, .csv, можно .gz) или - для stdin.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат входных данных; по умолчанию по расширению файла.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--on-duplicate', choices=('skip', 'update'), default='skip',
+            help='Что делать с новостями, id которых уже есть в базе.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        data_format = options['format'] or self.guess_format(path)
+        upsert = options['on_duplicate'] == 'update'
+        stdin = options.get('stdin', sys.stdin)
+        stream = self.open(path, stdin)
+        stats = Counter()
+        try:
+            records = self.read(stream, data_format)
+            total = 0
+            started = time.monotonic()
+            while chunk := list(islice(records, batch_size)):
+                self.save(self.validate(chunk, stats), upsert, stats)
+                total += len(chunk)
+                elapsed = time.monotonic() - started
+                self.stderr.write(
+                    f'{total} строк, {total / elapsed:.0f} строк/с'
+                    if elapsed else f'{total} строк'
+                )
+        finally:
+            if stream is not stdin:
+                stream.close()
+        bump_versions(LIST_VERSION, FEED_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено: {stats["created"]}, '
+            f'обновлено: {stats["updated"]}, '
+            f'пропущено: {stats["invalid"] + stats["duplicate"]} '
+            f'(с ошибками: {stats["invalid"]}, '
+            f'повторы id: {stats["duplicate"]})'
+        ))
+
+    @staticmethod
+    def guess_format(path):
+        name = path.removesuffix('.gz')
+        return 'csv' if name.endswith('.csv') else 'jsonl'
+
+    @staticmethod
+    def open(path, stdin):
+        if path == '-':
+            return stdin
+        if path.endswith('.gz'):
+            return io.TextIOWrapper(
+                gzip.open(path), encoding='utf-8', newline=''
+            )
+        return open(path, encoding='utf-8', newline='')
+
+    def read(self, stream, data_format):
+        """Построчно читает записи с номерами строк, не читая вход целиком."""
+        if data_format == 'csv':
+            return enumerate(csv.DictReader(stream), start=2)
+        return (
+            (number, self.parse_json(number, line))
+            for number, line in enumerate(stream, start=1)
+            if line.strip()
+        )
+
+    @staticmethod
+    def parse_json(number, line):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+    def validate(self, records, stats):
+        """
+        Новости из записей, прошедших проверки модели, как в форме.
+
+        Неверные записи пропускаются с сообщением в stderr. Уникальность
+        id здесь не проверяется: для пачки её проверяет save() одним
+        запросом.
+        """
+        batch = []
+        for number, record in records:
+            try:
+                news = self.build(record)
+                news.full_clean(
+                    validate_unique=False, validate_constraints=False
+                )
+            except ValidationError as error:
+                stats['invalid'] += 1
+                messages = '; '.join(
+                    f'{field}: {" ".join(errors)}'
+                    for field, errors in error.message_dict.items()
+                )
+                self.stderr.write(f'Строка {number} пропущена: {messages}')
+            else:
+                batch.append(news)
+        return batch
+
+    @staticmethod
+    def build(record):
+        if not isinstance(record, dict):
+            raise ValidationError({'__all__': ['Ожидается объект.']})
+        news = News(title=record.get('title'), text=record.get('text'))
+        for name in ('id', 'date'):
+            if record.get(name):
+                try:
+                    value = News._meta.get_field(name).to_python(record[name])
+                except ValidationError as error:
+                    raise ValidationError({name: error.messages})
+                setattr(news, name, value)
+        return news
+
+    @staticmethod
+    def save(batch, upsert, stats):
+        """
+        Вставляет пачку, а новости с уже занятым id обновляет
+        или пропускает.
+
+        Занятые id читаются одним запросом на пачку, чтобы в отчёт
+        попали только действительно добавленные строки. Повтор id
+        внутри пачки тоже пропускается.
+        """
+        unique, seen = [], set()
+        for news in batch:
+            if news.pk is None or news.pk not in seen:
+                unique.append(news)
+                seen.add(news.pk)
+        stats['duplicate'] += len(batch) - len(unique)
+        ids = seen - {None}
+        with transaction.atomic():
+            existing = set(News.objects.filter(pk__in=ids).values_list(
+                'pk', flat=True
+            )) if ids else set()
+            stats['created'] += len(unique) - len(existing)
+            if upsert:
+                News.objects.bulk_create(
+                    unique,
+                    update_conflicts=True,
+                    unique_fields=('id',),
+                    update_fields=UPDATE_FIELDS,
+                )
+                stats['updated'] += len(existing)
+                bump_versions(*map(news_version, existing))
+            else:
+                News.objects.bulk_create(
+                    [news for news in unique if news.pk not in existing],
+                    ignore_conflicts=True,
+                )
+                stats['duplicate'] += len(existing)
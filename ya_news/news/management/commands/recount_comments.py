@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев у новостей.'
+
+    def handle(self, *args, **options):
+        comment_count = (
+            Comment.objects
+            .filter(news=OuterRef('pk'))
+            .order_by()
+            .values('news')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updated = News.objects.update(
+            comment_count=Coalesce(Subquery(comment_count), 0)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import BadWord
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо — Корасик для поиска множества подстрок.
+
+    Строится один раз по словарю и находит любое из слов за один проход
+    по тексту, независимо от размера словаря.
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word in words:
+            if word:
+                self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = next_state
+        if self.output[state] is None:
+            self.output[state] = word
+
+    def _link(self):
+        """Строим суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                link = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = link if link != next_state else 0
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[
+                        self.fail[next_state]
+                    ]
+
+    def find(self, text):
+        """Возвращает первое найденное слово словаря или None."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+def read_words_file(path):
+    """Слова из файла: по одному на строке, # начинает комментарий."""
+    with open(path, encoding='utf-8') as words_file:
+        for line in words_file:
+            word = line.split('#', 1)[0].strip().lower()
+            if word:
+                yield word
+
+
+class BadWordsDictionary:
+    """
+    Словарь запрещённых слов с перезагрузкой без перезапуска процесса.
+
+    Слова собираются из встроенного списка, файла BAD_WORDS_FILE
+    и таблицы BadWord. Не чаще раза в BAD_WORDS_RELOAD_INTERVAL секунд
+    проверяется подпись источников (время изменения файла, число
+    и время последнего изменения записей в таблице); автомат
+    перестраивается, только если подпись изменилась.
+    """
+
+    def __init__(self, base_words=()):
+        self.base_words = tuple(word.lower() for word in base_words)
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._signature = None
+        self._checked_at = float('-inf')
+
+    def find(self, text):
+        """Первое запрещённое слово в тексте или None."""
+        return self.get_matcher().find(text.lower())
+
+    def get_matcher(self):
+        matcher = self._matcher
+        now = time.monotonic()
+        if now - self._checked_at >= settings.BAD_WORDS_RELOAD_INTERVAL:
+            with self._lock:
+                signature = self._get_signature()
+                if self._matcher is None or signature != self._signature:
+                    self._matcher = AhoCorasick(self._load_words())
+                    self._signature = signature
+                self._checked_at = now
+                matcher = self._matcher
+        return matcher
+
+    def expire(self):
+        """Проверить источники при следующем обращении."""
+        self._checked_at = float('-inf')
+
+    def _get_signature(self):
+        path = settings.BAD_WORDS_FILE
+        file_signature = None
+        if path:
+            try:
+                stat = os.stat(path)
+                file_signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        table = BadWord.objects.aggregate(
+            total=Count('pk'), updated=Max('updated')
+        )
+        return file_signature, table['total'], table['updated']
+
+    def _load_words(self):
+        words = set(self.base_words)
+        path = settings.BAD_WORDS_FILE
+        if path:
+            try:
+                words.update(read_words_file(path))
+            except OSError:
+                pass
+        words.update(
+            word.lower()
+            for word in BadWord.objects.values_list('word', flat=True)
+        )
+        return sorted(words)
@@ -3,13 +3,104 @@ from datetime import datetime, timedelta
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from news.models import Comment, News
 
 User = get_user_model()
 
+# Размеры данных, на которых проверяется бюджет SQL-запросов: одна
+# строка и дважды больше, чем помещается на страницу. На одной строке
+# запросов может быть меньше.
+QUERY_BUDGET_SIZES = (1, 25, 50)
+
+
+@pytest.fixture
+def cached_auth(settings):
+    """Включает кеш пользователя сессии, как AUTH_USER_CACHE = True."""
+    settings.AUTH_USER_CACHE = True
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.MIDDLEWARE = [
+        'yacore.auth_cache.CachedAuthenticationMiddleware'
+        if name == 'django.contrib.auth.middleware.AuthenticationMiddleware'
+        else name
+        for name in settings.MIDDLEWARE
+    ]
+
+
+@pytest.fixture(autouse=True)
+def test_cache(settings, tmp_path):
+    """
+    У каждого теста свой пустой файловый кеш во временном каталоге.
+
+    Кеш проекта тоже файловый, и тесты не должны сбрасывать в нём
+    сессии, пользователей и страницы. Кеш в памяти не подходит:
+    с ним не включается кеш пользователя сессии.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tmp_path / 'cache',
+        }
+    }
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка бюджета SQL-запросов представления.
+
+    Возвращает функцию check(make_request, budget, grow): для каждого
+    размера из QUERY_BUDGET_SIZES grow(size) доводит данные до size
+    строк, после чего make_request() выполняется с пустым кешем.
+    Запросов должно быть не больше budget, а на двух последних размерах
+    одинаково, иначе тест падает со списком SQL.
+    """
+    def check(make_request, budget, grow, sizes=QUERY_BUDGET_SIZES):
+        counts = {}
+        for size in sizes:
+            grow(size)
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                make_request()
+            queries = context.captured_queries
+            if len(queries) > budget:
+                pytest.fail(
+                    f'{len(queries)} SQL-запросов при {size} строках, '
+                    f'бюджет {budget}:\n{format_queries(queries)}'
+                )
+            counts[size] = queries
+        smaller, larger = sizes[-2:]
+        if len(counts[larger]) != len(counts[smaller]):
+            pytest.fail(
+                'Число SQL-запросов растёт с данными: '
+                f'{len(counts[smaller])} при {smaller} строках, '
+                f'{len(counts[larger])} при {larger}:\n'
+                f'{format_queries(counts[larger])}'
+            )
+    return check
+
+
+@pytest.fixture
+def staff_client():
+    """Создает авторизованный клиент для сотрудника."""
+    client = Client()
+    client.force_login(
+        User.objects.create(username='Редактор', is_staff=True)
+    )
+    return client
+
 
 @pytest.fixture
 def author():
@@ -96,6 +187,12 @@ def detail_url(news):
     return reverse('news:detail', args=(news.pk,))
 
 
+@pytest.fixture
+def comments_url(news):
+    """URL подгрузки комментариев новости."""
+    return reverse('news:comments', args=(news.pk,))
+
+
 @pytest.fixture
 def comment_edit_url(comment):
     """URL редактирования комментария."""
@@ -108,6 +205,24 @@ def comment_delete_url(comment):
     return reverse('news:delete', args=(comment.pk,))
 
 
+@pytest.fixture
+def cache_stats_url():
+    """URL счётчиков кеша страниц."""
+    return reverse('news:cache_stats')
+
+
+@pytest.fixture
+def export_url():
+    """URL выгрузки новостей."""
+    return reverse('news:export')
+
+
+@pytest.fixture
+def rss_url():
+    """URL RSS-ленты."""
+    return reverse('news:rss')
+
+
 @pytest.fixture
 def login_url():
     """URL страницы входа."""
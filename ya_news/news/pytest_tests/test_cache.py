@@ -0,0 +1,184 @@
+from http import HTTPStatus
+
+import pytest
+
+from news.models import Comment, News
+from yacore.compression import WhitespaceMinifier
+
+pytestmark = pytest.mark.django_db
+
+
+def test_anonymous_page_cached(
+        client, news, detail_url, cache_stats_url, staff_client
+):
+    """Повторный анонимный запрос отдаётся из кеша."""
+    first = client.get(detail_url)
+    second = client.get(detail_url)
+    assert second.content == first.content
+    stats = staff_client.get(cache_stats_url).json()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_page_cached_minified(client, news, detail_url, monkeypatch):
+    """В кеш попадает уже очищенная страница, и повторно её не чистят."""
+    client.get(detail_url)
+    calls = []
+    feed = WhitespaceMinifier.feed
+    monkeypatch.setattr(
+        WhitespaceMinifier, 'feed',
+        lambda self, data: calls.append(data) or feed(self, data),
+    )
+    response = client.get(detail_url)
+    assert b'\n ' not in response.content
+    assert calls == []
+
+
+def test_page_cache_ignores_unknown_params(
+        client, news, home_url, cache_stats_url, staff_client
+):
+    """Параметры, которых представление не читает, не плодят записи."""
+    client.get(home_url, {'x': 1})
+    client.get(home_url, {'x': 2})
+    stats = staff_client.get(cache_stats_url).json()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_versions_bumped_after_commit(
+        client, news, author, detail_url, django_capture_on_commit_callbacks
+):
+    """До фиксации транзакции кеш страницы новости не сбрасывается."""
+    client.get(detail_url)
+    with django_capture_on_commit_callbacks() as callbacks:
+        Comment.objects.create(news=news, author=author, text='Черновик')
+        assert 'Черновик' not in client.get(detail_url).content.decode()
+    assert callbacks
+
+
+def test_new_comment_invalidates_cache(
+        client, news, author, detail_url, home_url,
+        django_capture_on_commit_callbacks
+):
+    """Новый комментарий сразу виден на закешированных страницах."""
+    client.get(detail_url)
+    client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Свежий отзыв')
+    assert 'Свежий отзыв' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_authorized_page_not_cached(author_client, comment, detail_url):
+    """Авторизованный пользователь получает страницу со своими ссылками."""
+    author_client.get(detail_url)
+    response = author_client.get(detail_url)
+    assert 'form' in response.context
+    assert 'Редактировать' in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    'client_fixture, expected_status',
+    [
+        ('reader_client', HTTPStatus.FORBIDDEN),
+        ('staff_client', HTTPStatus.OK),
+    ],
+)
+def test_cache_stats_staff_only(
+        client_fixture, expected_status, cache_stats_url, request
+):
+    """Счётчики кеша доступны только сотрудникам."""
+    client = request.getfixturevalue(client_fixture)
+    response = client.get(cache_stats_url)
+    assert response.status_code == expected_status
+
+
+def test_fragments_follow_news_version(
+        author_client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """Фрагменты шаблона обновляются при изменении новости."""
+    author_client.get(detail_url)
+    News.objects.filter(pk=news.pk).update(title='Без сигнала')
+    assert 'Без сигнала' not in author_client.get(detail_url).content.decode()
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert 'Новый заголовок' in author_client.get(detail_url).content.decode()
+
+
+@pytest.mark.parametrize('url_name', ['home_url', 'detail_url'])
+def test_conditional_get(client, news, url_name, request):
+    """Неизменившаяся страница отдаётся ответом 304 по ETag."""
+    url = request.getfixturevalue(url_name)
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_edit_changes_etag(
+        client, comment, detail_url, django_capture_on_commit_callbacks
+):
+    """Правка комментария меняет ETag, а Last-Modified не отдаётся."""
+    response = client.get(detail_url)
+    assert not response.has_header('Last-Modified')
+    comment.text = 'Исправленный текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK
+    assert 'Исправленный текст' in response.content.decode()
+
+
+def test_etag_changes_with_comments(
+        client, news, author, detail_url, django_capture_on_commit_callbacks
+):
+    """После нового комментария ETag меняется и страница отдаётся целиком."""
+    etag = client.get(detail_url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Новый')
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_etag_varies_by_user(author_client, reader_client, news, detail_url):
+    """Валидаторы авторизованных пользователей различаются."""
+    author_response = author_client.get(detail_url)
+    reader_response = reader_client.get(
+        detail_url, HTTP_IF_NONE_MATCH=author_response['ETag']
+    )
+    assert reader_response.status_code == HTTPStatus.OK
+    assert not author_response.has_header('Last-Modified')
+    assert 'private' in author_response['Cache-Control']
+
+
+@pytest.mark.parametrize(
+    'validator_header, request_header',
+    [
+        ('ETag', 'HTTP_IF_NONE_MATCH'),
+        ('Last-Modified', 'HTTP_IF_MODIFIED_SINCE'),
+    ],
+)
+def test_feed_conditional_get(
+        client, news, rss_url, validator_header, request_header
+):
+    """Неизменившаяся лента отдаётся ответом 304."""
+    response = client.get(rss_url)
+    assert news.title in response.content.decode()
+    repeated = client.get(
+        rss_url, **{request_header: response[validator_header]}
+    )
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_feed_rebuilt_on_news_change(
+        client, news, rss_url, django_capture_on_commit_callbacks
+):
+    """После изменения новости лента собирается заново."""
+    etag = client.get(rss_url)['ETag']
+    news.title = 'Свежий заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    response = client.get(rss_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Свежий заголовок' in response.content.decode()
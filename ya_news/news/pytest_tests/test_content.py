@@ -1,7 +1,19 @@
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory
+from django.urls import reverse
 import pytest
 
+from news.async_views import (
+    AsyncCommentList, AsyncNewsDetail, AsyncNewsList
+)
+from news.cache import get_page_cache_stats
 from news.forms import CommentForm
+from news.models import Comment, News
 
 pytestmark = pytest.mark.django_db
 
@@ -9,7 +21,7 @@ pytestmark = pytest.mark.django_db
 def test_news_count(client, multiple_news, home_url):
     """Количество новостей на главной странице."""
     response = client.get(home_url)
-    news_count = response.context['object_list'].count()
+    news_count = len(response.context['object_list'])
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
@@ -40,3 +52,124 @@ def test_authorized_client_form(author_client, news, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_news_next_page(client, multiple_news, home_url):
+    """Курсор ведёт на следующую страницу без повторов новостей."""
+    first_page = client.get(home_url).context
+    assert first_page['page'].has_next
+    response = client.get(
+        home_url, {'cursor': first_page['page'].next_cursor}
+    )
+    first_ids = {news.pk for news in first_page['object_list']}
+    next_ids = {news.pk for news in response.context['object_list']}
+    assert not first_ids & next_ids
+    assert len(first_ids | next_ids) == len(multiple_news)
+    assert not response.context['page'].has_next
+
+
+def test_news_bad_cursor(client, home_url):
+    """Некорректный курсор приводит к 404."""
+    response = client.get(home_url, {'cursor': 'not-a-cursor'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_comments_paginated(
+        client, news, multiple_comments, detail_url, comments_url, settings
+):
+    """На странице новости первые комментарии, остальные подгружаются."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    response = client.get(detail_url)
+    comments = list(response.context['comments'])
+    assert len(comments) == 2
+    cursor = response.context['comments_page'].next_cursor
+    response = client.get(comments_url, {'cursor': cursor})
+    rest = list(response.context['comments'])
+    assert len(rest) == 2
+    assert not {c.pk for c in comments} & {c.pk for c in rest}
+    assert [c.created for c in comments + rest] == sorted(
+        c.created for c in comments + rest
+    )
+
+
+def get_async(view_class, path, headers=None, **kwargs):
+    """Вызывает async-представление анонимным запросом и рендерит ответ."""
+    request = AsyncRequestFactory().get(path, headers=headers)
+    request.user = AnonymousUser()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    response = async_to_sync(view_class.as_view())(request, **kwargs)
+    return response.render() if hasattr(response, 'render') else response
+
+
+def test_async_news_list(multiple_news, home_url):
+    """Асинхронная лента выводит ту же страницу новостей."""
+    response = get_async(AsyncNewsList, home_url)
+    news_list = response.context_data['object_list']
+    assert len(news_list) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert response.context_data['page'].has_next
+
+
+def test_async_news_detail(news, multiple_comments, detail_url, settings):
+    """Асинхронная страница новости выводит первые комментарии."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    response = get_async(AsyncNewsDetail, detail_url, pk=news.pk)
+    assert response.context_data['news'] == news
+    assert len(response.context_data['comments']) == 2
+    assert 'form' not in response.context_data
+
+
+def test_async_news_list_not_modified(multiple_news, home_url):
+    """Асинхронная лента, как синхронная, отвечает 304 на свежий ETag."""
+    response = get_async(AsyncNewsList, home_url)
+    response = get_async(
+        AsyncNewsList, home_url, headers={'If-None-Match': response['ETag']}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_async_news_detail_page_cache(news, detail_url):
+    """Анонимная асинхронная страница новости берётся из кеша страниц."""
+    first = get_async(AsyncNewsDetail, detail_url, pk=news.pk)
+    second = get_async(AsyncNewsDetail, detail_url, pk=news.pk)
+    assert second.content == first.content
+    assert get_page_cache_stats()['hits'] == 1
+
+
+def test_async_comment_list_missing_news(news):
+    """Асинхронная подгрузка комментариев чужого id отвечает 404."""
+    missing = news.pk + 1
+    with pytest.raises(Http404):
+        get_async(
+            AsyncCommentList,
+            reverse('news:comments', args=(missing,)),
+            pk=missing,
+        )
+
+
+def test_search_news_and_comments(client, news, author):
+    """Поиск находит новости и комментарии и подсвечивает слова."""
+    News.objects.create(title='Погода', text='Дождь и <b>ветер</b>')
+    Comment.objects.create(
+        news=news, author=author, text='Сильный ветер ночью'
+    )
+    response = client.get(reverse('news:search'), {'q': 'ветер'})
+    news_results = response.context['news_results']
+    assert [item.title for item in news_results] == ['Погода']
+    assert '<mark>ветер</mark>' in news_results[0].snippet
+    assert '&lt;b&gt;' in news_results[0].snippet
+    comment_results = response.context['comment_results']
+    assert [item.news for item in comment_results] == [news]
+
+
+def test_search_follows_updates(client, news):
+    """Индекс поиска обновляется вместе с новостью."""
+    news.text = 'Совсем другой текст про космос'
+    news.save()
+    response = client.get(reverse('news:search'), {'q': 'космос'})
+    assert response.context['news_results'] == [news]
+    response = client.get(reverse('news:search'), {'q': 'новости"'})
+    assert response.context['news_results'] == []
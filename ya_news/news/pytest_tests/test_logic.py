@@ -1,10 +1,24 @@
+import gzip
+import json
+import signal
 from http import HTTPStatus
+from io import StringIO
+from unittest.mock import Mock, patch
 
 import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import engines
+from django.template.loaders.filesystem import Loader
+from django.test import Client, override_settings
 from django.urls import reverse
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import BadWord, Comment, News
+from news.moderation import AhoCorasick
+from yacore.management.commands import serve
+from yacore.management.commands.serve import Command as ServeCommand
+from yacore.warmup import warm_up
 
 pytestmark = pytest.mark.django_db
 
@@ -93,3 +107,278 @@ def test_delete_comment_another_user(reader_client, comment):
     response = reader_client.post(delete_url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert comment.news.comment_set.count() == initial_count
+
+
+def test_comment_count_follows_comments(
+        author_client, news, detail_url, comment_delete_url
+):
+    """Счётчик комментариев новости меняется при создании и удалении."""
+    author_client.post(detail_url, data={'text': 'Ещё комментарий'})
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count() == 2
+    author_client.post(comment_delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count() == 1
+
+
+def test_recount_comments_command(news, multiple_comments):
+    """Команда recount_comments восстанавливает счётчики комментариев."""
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count()
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('ushers', 'she'),
+        ('this', 'his'),
+        ('ahishers', 'his'),
+        ('nothing at all', None),
+    ],
+)
+def test_aho_corasick_find(text, expected):
+    """Автомат находит первое вхождение любого слова словаря."""
+    assert AhoCorasick(('he', 'she', 'his', 'hers')).find(text) == expected
+
+
+def test_bad_words_reloaded_from_sources(
+        author_client, news, detail_url, settings, tmp_path
+):
+    """Слова из таблицы и файла подхватываются без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nбяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    BadWord.objects.create(word='Злодей')
+    initial_count = news.comment_set.count()
+    for text in ('Вот бяка', 'Какой злодей'):
+        response = author_client.post(detail_url, data={'text': text})
+        assert WARNING in response.context['form'].errors['text']
+    assert news.comment_set.count() == initial_count
+
+
+def test_import_news_jsonl_from_stdin():
+    """Новости загружаются из JSONL на stdin пачками."""
+    lines = '\n'.join(
+        json.dumps({'title': f'Новость {index}', 'text': 'Текст',
+                    'date': '2022-01-01'})
+        for index in range(5)
+    )
+    call_command(
+        'import_news', '-', batch_size=2,
+        stdin=StringIO(lines), stdout=StringIO(), stderr=StringIO(),
+    )
+    assert News.objects.count() == 5
+
+
+@pytest.mark.parametrize(
+    'on_duplicate, expected_title, report',
+    [
+        ('skip', 'Заголовок', 'Добавлено: 1, обновлено: 0, пропущено: 1'),
+        ('update', 'Обновлено', 'Добавлено: 1, обновлено: 1, пропущено: 0'),
+    ],
+)
+def test_import_news_duplicates(
+    news, tmp_path, on_duplicate, expected_title, report
+):
+    """Дубликаты по id пропускаются или обновляются."""
+    path = tmp_path / 'news.csv'
+    path.write_text(
+        f'id,title,text,date\n{news.pk},Обновлено,Новый текст,2022-01-01\n'
+        ',Другая,Текст,2022-01-02\n',
+        encoding='utf-8',
+    )
+    stdout = StringIO()
+    call_command(
+        'import_news', str(path), on_duplicate=on_duplicate,
+        stdout=stdout, stderr=StringIO(),
+    )
+    news.refresh_from_db()
+    assert news.title == expected_title
+    assert News.objects.count() == 2
+    assert report in stdout.getvalue()
+
+
+def test_import_news_skips_invalid_rows():
+    """Неверные строки пропускаются, остальные загружаются."""
+    lines = '\n'.join(json.dumps(record) for record in (
+        {'title': 'Новость', 'text': 'Текст'},
+        {'title': '', 'text': 'Текст'},
+        {'title': 'Новость', 'text': None},
+        {'title': 'З' * 51, 'text': 'Текст'},
+        {'title': 'Новость', 'text': 'Текст', 'date': 'вчера'},
+        ['не объект'],
+    ))
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'import_news', '-', batch_size=4,
+        stdin=StringIO(lines), stdout=stdout, stderr=stderr,
+    )
+    assert News.objects.count() == 1
+    assert 'Добавлено: 1, обновлено: 0, пропущено: 5' in stdout.getvalue()
+    assert 'Строка 2 пропущена: title:' in stderr.getvalue()
+    assert 'Строка 5 пропущена: date:' in stderr.getvalue()
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_export_news(staff_client, comment, export_url, compressed):
+    """Сотрудник выгружает новости с комментариями в NDJSON."""
+    response = staff_client.get(
+        export_url, {'gzip': 1} if compressed else {}
+    )
+    assert response.status_code == HTTPStatus.OK
+    content = b''.join(response.streaming_content)
+    if compressed:
+        content = gzip.decompress(content)
+    records = [json.loads(line) for line in content.splitlines()]
+    assert len(records) == 1
+    assert records[0]['title'] == comment.news.title
+    assert records[0]['comments'][0]['text'] == comment.text
+    assert records[0]['comments'][0]['author'] == comment.author.username
+
+
+def test_export_news_staff_only(reader_client, export_url):
+    """Обычный пользователь не может выгрузить новости."""
+    response = reader_client.get(export_url)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_export_news_command_round_trip(comment, tmp_path):
+    """Выгрузка команды export_news загружается обратно import_news."""
+    path = tmp_path / 'news.jsonl.gz'
+    call_command('export_news', output=str(path), gzip=True)
+    News.objects.all().delete()
+    call_command(
+        'import_news', str(path), stdout=StringIO(), stderr=StringIO()
+    )
+    assert News.objects.get().title == comment.news.title
+
+
+def test_slow_query_log(settings, tmp_path, news, detail_url):
+    """Медленные запросы пишутся в журнал с планом и попадают в сводку."""
+    settings.SLOW_QUERY_LOG_FILE = str(tmp_path / 'queries.ndjson')
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    Client().get(detail_url)
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / 'queries.ndjson').read_text().splitlines()
+    ]
+    assert entries
+    assert {entry['view'] for entry in entries} == {'NewsDetailView'}
+    assert {entry['url_name'] for entry in entries} == {'news:detail'}
+    assert all(entry['plan'] for entry in entries)
+    stdout = StringIO()
+    call_command('querylog_report', stdout=stdout)
+    assert 'NewsDetailView' in stdout.getvalue()
+
+
+def test_slow_query_log_streaming(settings, tmp_path, news, staff_client):
+    """Запросы, выполненные при отдаче потокового ответа, тоже в журнале."""
+    settings.SLOW_QUERY_LOG_FILE = str(tmp_path / 'queries.ndjson')
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    response = staff_client.get(reverse('news:export'))
+    assert news.title in b''.join(response.streaming_content).decode()
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / 'queries.ndjson').read_text().splitlines()
+    ]
+    assert any(
+        entry['view'] == 'NewsExport' and 'FROM "news_news"' in entry['sql']
+        for entry in entries
+    )
+    assert connection.execute_wrappers == []
+
+
+def test_warm_up_compiles_templates(client, news, detail_url):
+    """После прогрева страницы рендерятся без чтения шаблонов с диска."""
+    engines['django'].engine.template_loaders[0].reset()
+    warm_up()
+    with patch.object(Loader, 'get_contents', side_effect=AssertionError):
+        response = client.get(detail_url)
+    assert response.status_code == HTTPStatus.OK
+
+
+class FakeWorkers:
+    """
+    Подменяет fork(), waitpid() и kill() главного процесса serve.
+
+    Каждый проход цикла главного процесса (его time.sleep()) самый
+    старый рабочий процесс выходит, как исчерпавший --max-requests;
+    после recycles таких выходов главный процесс получает SIGTERM.
+    """
+
+    def __init__(self, command, recycles):
+        self.command = command
+        self.recycles = recycles
+        self.started = []
+        self.exited = []
+
+    def fork(self):
+        self.started.append(1000 + len(self.started))
+        return self.started[-1]
+
+    def waitpid(self, pid, options):
+        return (self.exited.pop(0), 0) if self.exited else (0, 0)
+
+    def kill(self, pid, signum):
+        self.exited.append(pid)
+
+    def sleep(self, seconds):
+        if self.recycles:
+            self.recycles -= 1
+            self.exited.append(min(self.command.workers))
+        else:
+            self.command.signal = signal.SIGTERM
+
+
+def test_serve_replaces_recycled_workers(settings, tmp_path):
+    """Главный процесс serve запускает замену вышедшего рабочего."""
+    settings.METRICS_DIR = str(tmp_path)
+    command = ServeCommand(stdout=StringIO(), stderr=StringIO())
+    workers = FakeWorkers(command, recycles=3)
+    with (
+        patch.object(serve, 'make_server') as make_server,
+        patch.object(serve, 'registry') as registry,
+        patch.object(serve.signal, 'signal'),
+        patch.object(serve.os, 'fork', workers.fork),
+        patch.object(serve.os, 'waitpid', workers.waitpid),
+        patch.object(serve.os, 'kill', workers.kill),
+        patch.object(serve.time, 'sleep', workers.sleep),
+    ):
+        make_server.return_value.server_address = ('127.0.0.1', 8000)
+        call_command(command, workers=2, preload=False)
+    assert workers.started == [1000, 1001, 1002, 1003, 1004]
+    assert registry.retire.call_count == 5
+    assert command.workers == {}
+    assert command.failures == 0
+
+
+def test_serve_worker_stops_after_max_requests():
+    """Рабочий процесс serve выходит после --max-requests запросов."""
+    command = ServeCommand()
+    command.options = {
+        'preload': True, 'max_requests': 3, 'max_requests_jitter': 0,
+    }
+    command.server = Mock(handled=0)
+
+    def handle_request():
+        command.server.handled += 1
+
+    command.server.handle_request.side_effect = handle_request
+    with (
+        patch.object(serve, 'registry') as registry,
+        patch.object(serve.signal, 'signal'),
+    ):
+        command.work()
+    assert command.server.handled == 3
+    registry.flush.assert_called_with()
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
+def test_serve_refuses_process_local_cache():
+    """С кешем в памяти процесса serve не запускает несколько процессов."""
+    with pytest.raises(CommandError, match='default'):
+        call_command('serve', workers=2)
@@ -0,0 +1,75 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def grow_news(size):
+    """Доводит число новостей до size, у каждой есть комментарий."""
+    author = User.objects.get_or_create(username='Комментатор')[0]
+    for index in range(News.objects.count(), size):
+        news = News.objects.create(title=f'Новость {index}', text='Текст')
+        Comment.objects.create(news=news, author=author, text='Отзыв')
+
+
+def grow_comments(news):
+    """Доводит число комментариев к news до size, все от разных авторов."""
+    def grow(size):
+        for index in range(news.comment_set.count(), size):
+            author = User.objects.create(username=f'Автор {index}')
+            Comment.objects.create(news=news, author=author, text='Отзыв')
+    return grow
+
+
+# У авторизованного читателя с пустым кешем добавляются запросы
+# сессии и пользователя.
+@pytest.mark.parametrize(
+    'client_fixture, budget', [('client', 1), ('reader_client', 3)]
+)
+def test_home_budget(
+        query_budget, home_url, client_fixture, budget, request
+):
+    """Лента не делает запросов на каждую новость."""
+    client = request.getfixturevalue(client_fixture)
+    query_budget(lambda: client.get(home_url), budget, grow_news)
+
+
+@pytest.mark.parametrize(
+    'client_fixture, budget', [('client', 3), ('reader_client', 5)]
+)
+def test_detail_budget(
+        query_budget, news, detail_url, client_fixture, budget, request
+):
+    """Страница новости не делает запросов на каждый комментарий."""
+    client = request.getfixturevalue(client_fixture)
+    query_budget(
+        lambda: client.get(detail_url), budget, grow_comments(news)
+    )
+
+
+def test_comments_budget(query_budget, client, news, comments_url):
+    """Подгрузка комментариев укладывается в бюджет."""
+    query_budget(lambda: client.get(comments_url), 2, grow_comments(news))
+
+
+def test_feed_budget(query_budget, client, rss_url):
+    """RSS строится одним запросом."""
+    query_budget(lambda: client.get(rss_url), 1, grow_news)
+
+
+def test_search_budget(query_budget, client):
+    """Поиск по новостям и комментариям укладывается в бюджет."""
+    url = reverse('news:search')
+    query_budget(lambda: client.get(url, {'q': 'Новость'}), 3, grow_news)
+
+
+def test_export_budget(query_budget, staff_client, export_url):
+    """Выгрузка читает данные пачками, а не по строке."""
+    query_budget(
+        lambda: staff_client.get(export_url).getvalue(), 4, grow_news
+    )
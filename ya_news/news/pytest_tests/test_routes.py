@@ -1,6 +1,22 @@
+import gzip
+import json
 import pytest
 
 from http import HTTPStatus
+from http.cookies import SimpleCookie
+
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.templatetags.static import static
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yacore.auth_cache import CachedAuthenticationMiddleware
+from yacore.compression import WhitespaceMinifier, minify_chunks
+from yacore.metrics import SECONDS_BUCKETS, Histogram, registry
 
 pytestmark = pytest.mark.django_db
 
@@ -10,6 +26,8 @@ pytestmark = pytest.mark.django_db
     [
         ('home_url', 'client', HTTPStatus.OK),
         ('detail_url', 'client', HTTPStatus.OK),
+        ('comments_url', 'client', HTTPStatus.OK),
+        ('rss_url', 'client', HTTPStatus.OK),
         ('login_url', 'client', HTTPStatus.OK),
         ('signup_url', 'client', HTTPStatus.OK),
         ('comment_edit_url', 'author_client', HTTPStatus.OK),
@@ -20,6 +38,8 @@ pytestmark = pytest.mark.django_db
     ids=[
         'home-anonymous',
         'detail-anonymous',
+        'comments-anonymous',
+        'rss-anonymous',
         'login-anonymous',
         'signup-anonymous',
         'edit-author',
@@ -38,6 +58,13 @@ def test_pages_availability(
     assert response.status_code == expected_status
 
 
+@pytest.mark.parametrize('url_name', ('news:detail', 'news:comments'))
+def test_missing_news(client, news, url_name):
+    """Страница и комментарии несуществующей новости отвечают 404."""
+    response = client.get(reverse(url_name, args=(news.pk + 1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.parametrize(
     'url_name',
     ['comment_edit_url', 'comment_delete_url'],
@@ -56,3 +83,155 @@ def test_logout_page(client, logout_url):
     """Тестирует доступность страницы выхода."""
     response = client.post(logout_url)
     assert response.status_code == HTTPStatus.OK
+
+
+def auth_queries(client, url):
+    """Запросы к сессиям и пользователям при открытии страницы."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "django_session"' in query['sql']
+        or 'FROM "auth_user"' in query['sql']
+    ]
+
+
+def test_cached_auth(cached_auth, author_client, detail_url):
+    """Повторный запрос авторизованного не читает сессию и пользователя."""
+    author_client.get(detail_url)
+    assert auth_queries(author_client, detail_url) == []
+
+
+def test_auth_not_cached_by_default(author_client, detail_url):
+    """Без AUTH_USER_CACHE сессия и пользователь читаются из базы."""
+    author_client.get(detail_url)
+    assert len(auth_queries(author_client, detail_url)) == 2
+
+
+def test_cached_auth_logout(
+        cached_auth, author_client, comment_edit_url, logout_url
+):
+    """После выхода прежняя сессионная кука больше не действует."""
+    author_client.get(comment_edit_url)
+    replay = Client()
+    replay.cookies = SimpleCookie(author_client.cookies)
+    author_client.post(logout_url)
+    response = replay.get(comment_edit_url)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
+def test_cached_auth_requires_shared_cache():
+    """Кеш пользователя не включается с кешем в памяти процесса."""
+    with pytest.raises(ImproperlyConfigured):
+        CachedAuthenticationMiddleware(lambda request: None)
+
+
+def test_cached_auth_password_change(
+        cached_auth, author, author_client, comment_edit_url, login_url
+):
+    """После смены пароля закешированная сессия больше не действует."""
+    author_client.get(comment_edit_url)
+    author.set_password('new-password')
+    author.save()
+    response = author_client.get(comment_edit_url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f'{login_url}?next={comment_edit_url}'
+
+
+def test_server_timing(client, detail_url):
+    """Ответ содержит разбивку времени на SQL, шаблон и остальное."""
+    response = client.get(detail_url)
+    names = [
+        part.split(';')[0].strip()
+        for part in response['Server-Timing'].split(',')
+    ]
+    assert names == ['db', 'tpl', 'app', 'total']
+
+
+@pytest.mark.parametrize(
+    'client_fixture, expected_status',
+    [
+        ('staff_client', HTTPStatus.OK),
+        ('reader_client', HTTPStatus.FORBIDDEN),
+    ],
+)
+def test_metrics(client, detail_url, client_fixture, expected_status, request):
+    """Гистограммы по маршрутам доступны только сотрудникам."""
+    client.get(detail_url)
+    response = request.getfixturevalue(client_fixture).get('/metrics')
+    assert response.status_code == expected_status
+    if expected_status == HTTPStatus.OK:
+        assert (
+            'request_duration_seconds_count{view="news:detail"}'
+            in response.content.decode()
+        )
+
+
+def test_metrics_from_all_workers(
+        settings, tmp_path, client, staff_client, detail_url
+):
+    """/metrics складывает гистограммы всех рабочих процессов."""
+    settings.METRICS_DIR = tmp_path
+    registry.reset()
+    other_worker = Histogram(SECONDS_BUCKETS)
+    for _ in range(5):
+        other_worker.observe(0.01)
+    (tmp_path / '1.json').write_text(json.dumps({
+        'request_duration_seconds': {'news:detail': other_worker.dump()},
+    }))
+    client.get(detail_url)
+    registry.retire(1)
+    assert not (tmp_path / '1.json').exists()
+    assert (
+        'request_duration_seconds_count{view="news:detail"} 6'
+        in staff_client.get('/metrics').content.decode()
+    )
+
+
+def test_precompressed_static(settings, tmp_path, client, home_url):
+    """Статика собирается с хешем в имени и отдаётся сжатой копией."""
+    settings.STATIC_ROOT = tmp_path
+    call_command('collectstatic', interactive=False, verbosity=0)
+    url = static('css/base.css')
+    assert url != '/static/css/base.css'
+    assert url in client.get(home_url).content.decode()
+    response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+    with open(finders.find('css/base.css'), 'rb') as original:
+        assert gzip.decompress(response.getvalue()) == original.read()
+    response.close()
+
+
+@pytest.mark.parametrize('chunk_size', (None, 1, 5))
+def test_whitespace_minifier(chunk_size):
+    """Отступы убираются везде, кроме <pre> и <textarea>, и в потоке тоже."""
+    html = (
+        b'<div>\n    <p>a  b</p>\n  <pre>\n  code\n</pre>\n'
+        b'  <TEXTAREA>\n  text</textarea>\n</div>\n'
+    )
+    expected = (
+        b'<div>\n<p>a  b</p>\n<pre>\n  code\n</pre>\n'
+        b'<TEXTAREA>\n  text</textarea>\n</div>\n'
+    )
+    if chunk_size is None:
+        assert WhitespaceMinifier().feed(html) == expected
+    else:
+        chunks = (
+            html[start:start + chunk_size]
+            for start in range(0, len(html), chunk_size)
+        )
+        assert b''.join(minify_chunks(chunks)) == expected
+
+
+def test_compressed_minified_page(client, detail_url):
+    """Страница приходит в gzip и без отступов шаблонов."""
+    plain = client.get(detail_url)
+    assert b'\n ' not in plain.content
+    response = client.get(detail_url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == plain.content
@@ -0,0 +1,53 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import FEED_VERSION, LIST_VERSION, bump_versions, news_version
+from .forms import bad_words
+from .models import BadWord, Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, **kwargs):
+    """Увеличиваем счётчик комментариев новости одним UPDATE."""
+    if created and not raw:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшаем счётчик комментариев новости одним UPDATE."""
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Сбрасываем кеш ленты, RSS и страницы изменённой новости."""
+    bump_versions(LIST_VERSION, FEED_VERSION, news_version(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, created=True, **kwargs):
+    """
+    Сбрасываем кеш страницы новости с изменённым комментарием.
+
+    Лента зависит только от количества комментариев, поэтому её кеш
+    сбрасывается лишь при добавлении и удалении.
+    """
+    names = [news_version(instance.news_id)]
+    if created:
+        names.append(LIST_VERSION)
+    bump_versions(*names)
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def reload_bad_words(sender, **kwargs):
+    """Словарь этого процесса перестраивается при следующей проверке."""
+    bad_words.expire()
@@ -1,16 +1,40 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import async_views, feeds, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list = async_views.AsyncNewsList
+    news_detail = async_views.AsyncNewsDetailView
+    comment_list = async_views.AsyncCommentList
+else:
+    news_list = views.NewsList
+    news_detail = views.NewsDetailView
+    comment_list = views.CommentList
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list.as_view(), name='home'),
+    path('news/<int:pk>/', news_detail.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        comment_list.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'cache-stats/',
+        views.PageCacheStats.as_view(),
+        name='cache_stats'
+    ),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('export/', views.NewsExport.as_view(), name='export'),
+    path('feed/rss/', feeds.LatestNewsFeed(), name='rss'),
+    path('feed/atom/', feeds.AtomLatestNewsFeed(), name='atom'),
 ]
@@ -1,47 +1,130 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
 
+from yacore.pagination import KeysetPaginator
+from yacore.search import fts_search
+
+from .cache import (
+    LIST_VERSION,
+    AnonymousPageCacheMixin,
+    get_news_version,
+    get_page_cache_stats,
+    get_versions,
+    news_version,
+)
+from .conditional import conditional_page, news_etag, news_list_etag
+from .export import gzip_stream, iter_ndjson
 from .forms import CommentForm
 from .models import Comment, News
 
 
-class NewsList(generic.ListView):
+def get_news_paginator():
+    """Постраничный вывод ленты в порядке News.Meta.ordering."""
+    return KeysetPaginator(
+        News.objects.all(),
+        settings.NEWS_COUNT_ON_HOME_PAGE,
+        ordering=News._meta.ordering,
+    )
+
+
+@method_decorator(conditional_page(news_list_etag), name='dispatch')
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    page_cache_versions = (LIST_VERSION,)
+    page_cache_params = ('cursor',)
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим страницу новостей, следующую за курсором из запроса.
 
-        Их количество определяется в настройках проекта.
+        Размер страницы определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        self.page = get_news_paginator().get_page(
+            self.request.GET.get('cursor')
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        versions = get_versions(
+            *(news_version(news.pk) for news in self.page.object_list)
+        )
+        for news in self.page.object_list:
+            news.cache_version = versions[news_version(news.pk)]
+        return context
+
+
+def get_comments_paginator(news_id):
+    """
+    Постраничный вывод комментариев новости.
 
+    Загружаем только те поля комментария и автора, которые выводятся
+    в шаблоне. Размер страницы определяется в настройках проекта.
+    """
+    queryset = Comment.objects.filter(news_id=news_id).select_related(
+        'author'
+    ).only('news_id', 'text', 'created', 'author__username')
+    return KeysetPaginator(
+        queryset,
+        settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        ordering=Comment._meta.ordering,
+    )
 
-class NewsDetail(generic.DetailView):
+
+@method_decorator(conditional_page(news_etag), name='dispatch')
+class NewsDetail(AnonymousPageCacheMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
+    def get_page_cache_versions(self):
+        return (news_version(self.kwargs['pk']),)
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        comments_page = get_comments_paginator(self.object.pk).get_page()
+        context['comments'] = comments_page.object_list
+        context['comments_page'] = comments_page
+        context['cache_version'] = get_news_version(self.object.pk)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+@method_decorator(conditional_page(news_etag), name='dispatch')
+class CommentList(AnonymousPageCacheMixin, generic.ListView):
+    """Следующая страница комментариев новости в виде HTML-фрагмента."""
+    template_name = 'news/comments.html'
+    context_object_name = 'comments'
+    page_cache_params = ('cursor',)
+
+    def get_page_cache_versions(self):
+        return (news_version(self.kwargs['pk']),)
+
+    def get_queryset(self):
+        self.page = get_comments_paginator(self.kwargs['pk']).get_page(
+            self.request.GET.get('cursor')
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = self.page
+        context['news_id'] = self.kwargs['pk']
+        context['cache_version'] = get_news_version(self.kwargs['pk'])
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
         generic.detail.SingleObjectMixin,
@@ -78,6 +161,28 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            limit = settings.SEARCH_RESULTS_COUNT
+            context['news_results'] = fts_search(
+                News.objects.all(), 'news_news_fts', query, limit
+            )
+            context['comment_results'] = fts_search(
+                Comment.objects.select_related('news', 'author'),
+                'news_comment_fts',
+                query,
+                limit,
+            )
+        return context
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
@@ -102,3 +207,33 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class StaffOnlyMixin(UserPassesTestMixin):
+    """Доступ только для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class PageCacheStats(StaffOnlyMixin, generic.View):
+    """Счётчики кеша страниц для наблюдения за долей попаданий."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_page_cache_stats())
+
+
+class NewsExport(StaffOnlyMixin, generic.View):
+    """Потоковая выгрузка новостей с комментариями в NDJSON."""
+
+    def get(self, request, *args, **kwargs):
+        chunks = iter_ndjson()
+        filename = 'news.ndjson'
+        content_type = 'application/x-ndjson'
+        if request.GET.get('gzip'):
+            chunks = gzip_stream(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Общее для ya_news и ya_note приложение yacore лежит в корне репозитория.
+REPOSITORY_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
@@ -17,15 +17,32 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'yacore',
     'news.apps.NewsConfig',
 ]
 
+# Пользователь сессии из кеша (см. yacore.auth_cache): авторизованный
+# запрос не читает из базы сессию и пользователя. Выключено; включать
+# только с кешем, общим для всех процессов, иначе выход и смена пароля
+# сбросят запись лишь в одном рабочем процессе.
+AUTH_USER_CACHE = False
+# Сколько секунд пользователь сессии хранится в кеше.
+AUTH_USER_CACHE_TIMEOUT = 60
+
 MIDDLEWARE = [
+    'yacore.timing.ServerTimingMiddleware',
+    'yacore.querylog.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yacore.assets.StaticFilesMiddleware',
+    'yacore.compression.CompressionMiddleware',
+    'yacore.compression.HtmlMinifyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    (
+        'yacore.auth_cache.CachedAuthenticationMiddleware' if AUTH_USER_CACHE
+        else 'django.contrib.auth.middleware.AuthenticationMiddleware'
+    ),
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -36,8 +53,16 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны кешируются в процессе при любом
+            # DEBUG; при DEBUG автоперезагрузка сбрасывает кеш после
+            # правки шаблона. warmup.warm_up() заполняет кеш при старте.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -51,13 +76,61 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Прагмы SQLite для каждого нового соединения. WAL позволяет читать
+# во время записи, busy_timeout (мс) ждёт освобождения блокировки
+# вместо ошибки «database is locked», synchronous=NORMAL в режиме WAL
+# не портит базу при сбое. mmap_size в байтах, cache_size со знаком
+# минус — в КиБ. Пустой словарь оставляет настройки SQLite по умолчанию.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16 * 1024,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in SQLITE_PRAGMAS.items()
+            ),
+            # Транзакция сразу берёт блокировку записи, и ожидание
+            # busy_timeout срабатывает на BEGIN, а не падает на
+            # середине транзакции при попытке записать.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Соединение переживает запрос и проверяется перед повторным
+        # использованием.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Кеш общий для всех процессов (рабочих процессов serve, команд
+# manage.py): в нём версии записей и страницы, и сброс в одном
+# процессе должен быть виден остальным.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+# С кешем пользователя и сессии читаются из кеша, а в базу
+# записываются для надёжности.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if AUTH_USER_CACHE
+    else 'django.contrib.sessions.backends.db'
+)
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -74,9 +147,52 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# collectstatic складывает сюда файлы с хешем в имени и их копии .gz,
+# а yacore.assets.StaticFilesMiddleware их отдаёт.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'yacore.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_COUNT_ON_DETAIL_PAGE = 20
+NEWS_COUNT_IN_FEED = 20
+SEARCH_RESULTS_COUNT = 20
+# Время жизни страниц, закешированных для анонимных читателей, в секундах.
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+# Асинхронные представления ленты, новости и комментариев для запуска
+# через yanews.asgi. По умолчанию используются синхронные.
+NEWS_ASYNC_VIEWS = False
+
+# Файл с дополнительными запрещёнными словами, по одному на строке.
+BAD_WORDS_FILE = None
+# Как часто проверять, не изменился ли словарь запрещённых слов, в секундах.
+BAD_WORDS_RELOAD_INTERVAL = 30
+
+# Каталог, в котором рабочие процессы сохраняют гистограммы для
+# /metrics (см. yacore.metrics.Registry). None — каждый процесс отдаёт
+# только свои; команда serve тогда создаёт временный каталог.
+METRICS_DIR = None
+
+# Журнал медленных SQL-запросов в NDJSON (см. SlowQueryLogMiddleware
+# и команду querylog_report). None — журнал выключен. В файл пишут все
+# рабочие процессы, поэтому ротация внешняя, например logrotate.
+SLOW_QUERY_LOG_FILE = None
+# Запросы дольше порога пишутся всегда, с планом EXPLAIN QUERY PLAN.
+SLOW_QUERY_THRESHOLD_MS = 100
+# Доля остальных запросов, попадающих в журнал для сравнения.
+SLOW_QUERY_SAMPLE_RATE = 0.01
+
+# Текстовые ответы короче этого (байт) не сжимаются gzip.
+COMPRESS_MIN_LENGTH = 1024
@@ -0,0 +1,199 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+from .forms import WARNING, NoteBatchForm
+from .models import SLUG_ATTEMPTS, Note
+from .slugs import allocate_slugs
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+OPERATIONS = (CREATE, UPDATE, DELETE)
+FIELDS = ('title', 'text', 'slug')
+
+
+class BatchError(Exception):
+    """Пакет не применён; errors — ошибки по каждой операции."""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors
+
+
+def apply_batch(author, operations):
+    """
+    Применяет операции над заметками автора одной транзакцией.
+
+    Операции проверяются так же, как NoteForm, но уникальность slug
+    проверяется сразу для всего пакета одним запросом. Если хоть одна
+    операция неверна, не применяется ни одна, и BatchError содержит
+    ошибки по каждой. Иначе возвращается результат по каждой операции.
+    """
+    if not isinstance(operations, list):
+        raise BatchError('Ожидается список операций.')
+    if len(operations) > settings.NOTES_BATCH_MAX_OPERATIONS:
+        raise BatchError(
+            'Слишком много операций, максимум '
+            f'{settings.NOTES_BATCH_MAX_OPERATIONS}.'
+        )
+    ids = {
+        index: _note_id(operation)
+        for index, operation in enumerate(operations)
+        if isinstance(operation, dict) and operation.get('op') in (
+            UPDATE, DELETE
+        )
+    }
+    notes = Note.objects.filter(author=author).in_bulk(
+        [pk for pk in ids.values() if pk is not None]
+    )
+    # Формы меняют заметки из notes, а прежние slug нужны при сохранении.
+    old_slugs = {pk: note.slug for pk, note in notes.items()}
+    forms, errors = _validate(author, operations, ids, notes)
+    for attempt in range(SLUG_ATTEMPTS):
+        _check_slugs(forms, notes, errors)
+        if any(errors):
+            raise BatchError('Пакет содержит ошибки.', errors)
+        try:
+            with transaction.atomic():
+                return _save(operations, notes, ids, forms, old_slugs)
+        except IntegrityError:
+            if attempt == SLUG_ATTEMPTS - 1:
+                raise BatchError(
+                    'Не удалось сохранить пакет из-за одновременных '
+                    'изменений, повторите запрос.'
+                )
+
+
+def _validate(author, operations, ids, notes):
+    """Проверяет операции по отдельности, как NoteForm."""
+    errors = [{} for _ in operations]
+    id_counts = Counter(ids.values())
+    forms = {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get(
+            'op'
+        ) not in OPERATIONS:
+            errors[index]['op'] = [
+                f'Ожидается одна из операций: {", ".join(OPERATIONS)}.'
+            ]
+            continue
+        if index in ids:
+            if ids[index] not in notes:
+                errors[index]['id'] = ['Заметка не найдена.']
+                continue
+            if id_counts[ids[index]] > 1:
+                errors[index]['id'] = ['Заметка повторяется в пакете.']
+                continue
+        if operation['op'] == DELETE:
+            continue
+        form = NoteBatchForm(
+            data={field: operation.get(field) for field in FIELDS},
+            instance=notes.get(ids.get(index), Note(author=author)),
+        )
+        if form.is_valid():
+            forms[index] = form
+        else:
+            errors[index].update(
+                (field, list(messages))
+                for field, messages in form.errors.items()
+            )
+    return forms, errors
+
+
+def _note_id(operation):
+    """Id заметки из операции; нецелое значение считается отсутствующим."""
+    pk = operation.get('id')
+    if isinstance(pk, int) and not isinstance(pk, bool):
+        return pk
+    return None
+
+
+def _check_slugs(forms, changed_ids, errors):
+    """Указанные slug не должны повторяться в пакете и в базе."""
+    explicit = {
+        index: form.instance.slug
+        for index, form in forms.items() if form.cleaned_data['slug']
+    }
+    counts = Counter(explicit.values())
+    taken = set(Note.objects.filter(
+        slug__in=counts
+    ).exclude(pk__in=changed_ids).values_list('slug', flat=True))
+    for index, slug in explicit.items():
+        if counts[slug] > 1 or slug in taken:
+            errors[index]['slug'] = [slug + WARNING]
+
+
+def _free_slugs(updated, old_slugs):
+    """
+    Временные slug для заметок, чей slug в пакете переходит к другой.
+
+    bulk_update меняет все строки одним запросом, а SQLite проверяет
+    уникальность после каждой строки: при обмене slug двух заметок
+    первая строка столкнулась бы со второй. Временный slug начинается
+    с точки, недопустимой в SlugField, и не совпадёт ни с одним
+    настоящим.
+    """
+    targets = {note.slug for note in updated}
+    holders = [
+        note.pk for note in updated
+        if old_slugs[note.pk] != note.slug and old_slugs[note.pk] in targets
+    ]
+    if holders:
+        Note.objects.filter(pk__in=holders).update(slug=Concat(
+            Value('.'), Cast('pk', CharField()), output_field=CharField()
+        ))
+
+
+def _save(operations, notes, ids, forms, old_slugs):
+    """
+    Удаляет, изменяет и создаёт заметки тремя пакетными запросами.
+
+    Если заметки пакета обмениваются slug, перед изменением нужен ещё
+    один запрос (см. _free_slugs()).
+    """
+    created = [
+        form.instance for index, form in forms.items()
+        if operations[index]['op'] == CREATE
+    ]
+    for note in created:
+        # После отката неудачной попытки у заметок мог остаться id.
+        note.pk = None
+        note._state.adding = True
+    blank = [
+        form.instance for form in forms.values()
+        if not form.cleaned_data['slug']
+    ]
+    slugs = allocate_slugs(
+        Note.objects.exclude(pk__in=notes),
+        [note.title for note in blank],
+        Note._meta.get_field('slug').max_length,
+        reserved=[
+            form.instance.slug for form in forms.values()
+            if form.cleaned_data['slug']
+        ],
+    )
+    for note, slug in zip(blank, slugs):
+        note.slug = slug
+    Note.objects.filter(pk__in=[
+        ids[index] for index, operation in enumerate(operations)
+        if operation['op'] == DELETE
+    ]).delete()
+    updated = [
+        form.instance for index, form in forms.items()
+        if operations[index]['op'] == UPDATE
+    ]
+    _free_slugs(updated, old_slugs)
+    Note.objects.bulk_update(updated, FIELDS)
+    Note.objects.bulk_create(created)
+    results = []
+    for index, operation in enumerate(operations):
+        note = forms[index].instance if index in forms else notes[ids[index]]
+        results.append(
+            {'op': operation['op'], 'id': note.pk, 'slug': note.slug}
+        )
+    return results
@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug
+
+SLUG_ATTEMPTS = 3
 
 
 class Note(models.Model):
@@ -28,11 +30,37 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug подбирается по заголовку.
+
+        Между подбором и вставкой другой запрос может занять тот же slug,
+        поэтому при нарушении уникальности slug подбор повторяется.
+        Остальные ошибки целостности, например внешнего ключа,
+        пробрасываются сразу.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_length = self._meta.get_field('slug').max_length
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(
+                Note.objects, self.title, max_length, exclude_pk=self.pk
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1 or not self.slug_taken():
+                    raise
+
+    def slug_taken(self):
+        """Slug заметки уже занят другой заметкой."""
+        return Note.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
@@ -0,0 +1,125 @@
+import re
+from functools import partial, reduce
+from operator import or_
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+DEFAULT_SLUG = 'note'
+SEPARATOR = '-'
+# Символ, следующий за дефисом в таблице кодов: все строки вида
+# «основа-…» лежат в диапазоне [«основа-», «основа.»).
+AFTER_SEPARATOR = chr(ord(SEPARATOR) + 1)
+NUMBERED = re.compile(rf'(.+){SEPARATOR}(\d+)', re.ASCII)
+# Сколько основ проверять одним запросом: длинная цепочка OR упирается
+# в ограничение SQLite на глубину выражения.
+BASES_PER_QUERY = 200
+
+
+def base_slug(title, max_length):
+    """Транслитерированный заголовок, обрезанный до длины поля."""
+    return slugify(title)[:max_length].rstrip(SEPARATOR) or DEFAULT_SLUG
+
+
+def taken_condition(base):
+    """Условие на «основа» и «основа-…», которое обслуживает индекс."""
+    return Q(slug=base) | Q(
+        slug__gte=base + SEPARATOR, slug__lt=base + AFTER_SEPARATOR
+    )
+
+
+def taken_slugs(queryset, base):
+    return queryset.filter(
+        taken_condition(base)
+    ).values_list('slug', flat=True)
+
+
+def numbered(base, number, max_length):
+    """«основа-номер», при необходимости основа укорачивается."""
+    tail = f'{SEPARATOR}{number}'
+    return base[:max_length - len(tail)].rstrip(SEPARATOR) + tail
+
+
+def max_numbers(slugs):
+    """Наибольший занятый номер для каждой основы."""
+    numbers = {}
+    for match in map(NUMBERED.fullmatch, slugs):
+        if match:
+            base, number = match[1], int(match[2])
+            numbers[base] = max(numbers.get(base, 1), number)
+    return numbers
+
+
+def free_numbered(base, number, taken, checked, max_length, fetch_taken):
+    """
+    Первый свободный «основа-номер» с номером не меньше number.
+
+    Если основу пришлось укоротить под номер, «укороченная-номер» может
+    совпасть со slug вне прочитанного диапазона основы: занятые варианты
+    укороченной основы дочитывает fetch_taken(stem), checked — основы,
+    чьи варианты уже в taken. Возвращает slug и его номер.
+    """
+    while True:
+        slug = numbered(base, number, max_length)
+        stem = slug.rpartition(SEPARATOR)[0]
+        if stem not in checked:
+            checked.add(stem)
+            taken.update(fetch_taken(stem))
+            number = max(number, max_numbers(taken).get(stem, 1) + 1)
+        elif slug in taken:
+            number += 1
+        else:
+            return slug, number
+
+
+def allocate_slug(queryset, title, max_length, exclude_pk=None):
+    """
+    Свободный slug для заголовка: «основа», «основа-2», «основа-3»…
+
+    Транслитерация выполняется один раз, а занятые варианты читаются
+    одним запросом по диапазону, который обслуживает уникальный индекс
+    на slug (и ещё одним, если основу пришлось укоротить под номер).
+    Выбирается номер на единицу больше наибольшего занятого.
+    """
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    base = base_slug(title, max_length)
+    taken = set(taken_slugs(queryset, base))
+    if base not in taken:
+        return base
+    return free_numbered(
+        base, max_numbers(taken).get(base, 1) + 1, taken, {base},
+        max_length, partial(taken_slugs, queryset),
+    )[0]
+
+
+def allocate_slugs(queryset, titles, max_length, reserved=()):
+    """
+    Свободные slug для списка заголовков, в том же порядке.
+
+    Занятые варианты всех основ читаются одним запросом на каждые
+    BASES_PER_QUERY основ. Совпадающие заголовки получают разные номера,
+    значения из reserved тоже считаются занятыми.
+    """
+    bases = [base_slug(title, max_length) for title in titles]
+    unique_bases = list(dict.fromkeys(bases))
+    taken = set(reserved)
+    for start in range(0, len(unique_bases), BASES_PER_QUERY):
+        chunk = unique_bases[start:start + BASES_PER_QUERY]
+        taken.update(queryset.filter(
+            reduce(or_, map(taken_condition, chunk))
+        ).values_list('slug', flat=True))
+    numbers = max_numbers(taken)
+    checked = set(unique_bases)
+    slugs = []
+    for base in bases:
+        if base in taken:
+            slug, numbers[base] = free_numbered(
+                base, numbers.get(base, 1) + 1, taken, checked,
+                max_length, partial(taken_slugs, queryset),
+            )
+            slugs.append(slug)
+        else:
+            slugs.append(base)
+        taken.add(slugs[-1])
+    return slugs
@@ -1,11 +1,21 @@
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.models import Note
 
 User = get_user_model()
 
+# Размеры данных, на которых проверяется бюджет SQL-запросов: одна
+# строка и дважды больше, чем помещается на страницу. На одной строке
+# запросов может быть меньше.
+QUERY_BUDGET_SIZES = (1, 150, 300)
+
 
 class BaseTestCase(TestCase):
     """Общие тестовые данные."""
@@ -62,12 +72,15 @@ class BaseTestCase(TestCase):
         # URL-адреса
         cls.urls = {
             'add': reverse('notes:add'),
+            'batch': reverse('notes:batch'),
             'delete': reverse('notes:delete', args=(cls.note.slug,)),
             'detail': reverse('notes:detail', args=(cls.note.slug,)),
             'edit': reverse('notes:edit', args=(cls.note.slug,)),
             'home': reverse('notes:home'),
             'list': reverse('notes:list'),
             'login': reverse('users:login'),
+            'metrics': reverse('metrics'),
+            'search': reverse('notes:search'),
             'signup': reverse('users:signup'),
             'success': reverse('notes:success')
         }
@@ -85,3 +98,67 @@ class BaseTestCase(TestCase):
             'text': cls.NEW_TEXT,
             'slug': cls.NEW_SLUG
         }
+
+    @classmethod
+    def setUpClass(cls):
+        # Свой файловый кеш во временном каталоге, начиная
+        # с setUpTestData: кеш проекта тесты не трогают. Кеш в памяти
+        # не подходит: с ним не включается кеш пользователя сессии.
+        location = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(CACHES={
+            'default': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': location,
+            }
+        }))
+        super().setUpClass()
+
+    def setUp(self):
+        # Каждый тест начинается с пустым тестовым кешем.
+        cache.clear()
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов представления."""
+
+    def assert_query_budget(
+            self, make_request, budget, grow, sizes=QUERY_BUDGET_SIZES
+    ):
+        """
+        Запрос укладывается в budget и не зависит от объёма данных.
+
+        Для каждого размера из sizes grow(size) доводит данные до size
+        строк, после чего make_request() выполняется с пустым кешем.
+        Запросов должно быть не больше budget, а на двух последних
+        размерах одинаково, иначе тест падает со списком SQL.
+        """
+        counts = {}
+        for size in sizes:
+            grow(size)
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                make_request()
+            queries = context.captured_queries
+            if len(queries) > budget:
+                self.fail(
+                    f'{len(queries)} SQL-запросов при {size} строках, '
+                    f'бюджет {budget}:\n{format_queries(queries)}'
+                )
+            counts[size] = queries
+        smaller, larger = sizes[-2:]
+        if len(counts[larger]) != len(counts[smaller]):
+            self.fail(
+                'Число SQL-запросов растёт с данными: '
+                f'{len(counts[smaller])} при {smaller} строках, '
+                f'{len(counts[larger])} при {larger}:\n'
+                f'{format_queries(counts[larger])}'
+            )
@@ -19,6 +19,21 @@ class TestNoteList(BaseTestCase):
         notes = response.context['object_list']
         self.assertIn(self.note, notes)
 
+    def test_list_paginated(self):
+        """Список выводится по страницам без текста заметок."""
+        with self.settings(NOTES_COUNT_ON_LIST_PAGE=2):
+            first_page = self.author_client.get(self.urls['list']).context
+            self.assertTrue(first_page['page'].has_next)
+            response = self.author_client.get(
+                self.urls['list'], {'cursor': first_page['page'].next_cursor}
+            )
+        notes = [*first_page['object_list'], *response.context['object_list']]
+        self.assertEqual(
+            notes, [self.note, self.first_note, self.second_note]
+        )
+        self.assertFalse(response.context['page'].has_next)
+        self.assertIn('text', notes[0].get_deferred_fields())
+
 
 class TestNoteForms(BaseTestCase):
     """Тестирование форм для заметок."""
@@ -35,3 +50,23 @@ class TestNoteForms(BaseTestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+
+class TestNoteSearch(BaseTestCase):
+    """Тестирование поиска по заметкам."""
+
+    def test_author_finds_own_notes(self):
+        """Поиск находит заметку автора и подсвечивает слово."""
+        response = self.author_client.get(
+            self.urls['search'], {'q': 'первой'}
+        )
+        notes = response.context['object_list']
+        self.assertEqual(notes, [self.first_note])
+        self.assertIn('<mark>первой</mark>', notes[0].snippet)
+
+    def test_search_respects_ownership(self):
+        """Чужие заметки не попадают в результаты поиска."""
+        response = self.reader_client.get(
+            self.urls['search'], {'q': 'заметки'}
+        )
+        self.assertEqual(response.context['object_list'], [self.foreign_note])
@@ -1,10 +1,25 @@
+import json
+import signal
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from unittest.mock import Mock, patch
 
 from django.contrib.auth import get_user
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.template import engines
+from django.template.loaders.filesystem import Loader
+from django.test import Client, override_settings
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.slugs import allocate_slugs
+from yacore.management.commands import serve
+from yacore.management.commands.serve import Command as ServeCommand
+from yacore.warmup import warm_up
 from .conftest import BaseTestCase
 
 
@@ -48,6 +63,59 @@ class TestNoteCreation(BaseTestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertEqual(note.slug, expected_slug)
 
+    def test_slug_suffix(self):
+        """Совпавший автоматический slug получает следующий номер."""
+        base = slugify(self.form_data['title'])
+        Note.objects.create(
+            title='Другая', text='Текст', slug=f'{base}-5', author=self.author
+        )
+        self.form_data.pop('slug')
+        for expected_slug in (base, f'{base}-6', f'{base}-7'):
+            response = self.author_client.post(
+                self.urls['add'], data=self.form_data
+            )
+            self.assertRedirects(response, self.urls['success'])
+            self.assertTrue(Note.objects.filter(slug=expected_slug).exists())
+
+    def test_truncated_slug_suffix(self):
+        """
+        Укороченная под номер основа не совпадает с чужим slug,
+        ни при сохранении заметки, ни в пакете.
+        """
+        title = 'a' * 100
+        for slug in (title, f'{"a" * 98}-2'):
+            Note.objects.create(
+                title='Другая', text='Текст', slug=slug, author=self.author
+            )
+        note = Note.objects.create(
+            title=title, text='Текст', author=self.author
+        )
+        self.assertEqual(note.slug, f'{"a" * 98}-3')
+        self.assertEqual(
+            allocate_slugs(Note.objects, [title, title], 100),
+            [f'{"a" * 98}-4', f'{"a" * 98}-5'],
+        )
+
+    def test_slug_race(self):
+        """Если slug заняли между подбором и вставкой, подбор повторяется."""
+        with patch(
+            'notes.models.allocate_slug',
+            side_effect=[self.NOTE_SLUG, self.NEW_SLUG],
+        ):
+            note = Note.objects.create(
+                title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.author
+            )
+        self.assertEqual(note.slug, self.NEW_SLUG)
+
+    def test_other_integrity_error_not_retried(self):
+        """Ошибка целостности не из-за slug не повторяет подбор."""
+        with patch(
+            'notes.models.allocate_slug', return_value=self.NEW_SLUG
+        ) as allocate:
+            with self.assertRaises(IntegrityError):
+                Note(title=self.NOTE_TITLE, text=self.NOTE_TEXT).save()
+        self.assertEqual(allocate.call_count, 1)
+
     def test_duplicate(self):
         """Невозможно создать две заметки с одинаковым slug."""
         initial_count = Note.objects.count()
@@ -111,3 +179,200 @@ class TestNoteEditDelete(BaseTestCase):
         response = self.reader_client.delete(self.urls['delete'])
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), initial_count)
+
+
+class TestNoteBatch(BaseTestCase):
+
+    def post_batch(self, client, operations):
+        return client.post(
+            self.urls['batch'],
+            data={'operations': operations},
+            content_type='application/json',
+        )
+
+    def test_author_batch(self):
+        """Пакет создаёт, изменяет и удаляет заметки за один запрос."""
+        title_slug = slugify(self.NEW_TITLE)
+        response = self.post_batch(self.author_client, [
+            {'op': 'create', 'title': self.NEW_TITLE, 'text': 'Раз'},
+            {'op': 'create', 'title': self.NEW_TITLE, 'text': 'Два'},
+            {'op': 'update', 'id': self.first_note.id,
+             'title': self.NEW_TITLE, 'text': self.NEW_TEXT,
+             'slug': self.NEW_SLUG},
+            {'op': 'delete', 'id': self.second_note.id},
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.json()['results']
+        self.assertEqual(
+            [result['slug'] for result in results],
+            [title_slug, f'{title_slug}-2', self.NEW_SLUG, 'second-note'],
+        )
+        created = Note.objects.get(id=results[1]['id'])
+        self.assertEqual(created.text, 'Два')
+        self.assertEqual(created.author, self.author)
+        self.first_note.refresh_from_db()
+        self.assertEqual(self.first_note.text, self.NEW_TEXT)
+        self.assertFalse(
+            Note.objects.filter(id=self.second_note.id).exists()
+        )
+
+    def test_batch_rotates_slugs(self):
+        """Заметки пакета могут обменяться slug по кругу."""
+        notes = (self.note, self.first_note, self.second_note)
+        slugs = [note.slug for note in notes]
+        response = self.post_batch(self.author_client, [
+            {'op': 'update', 'id': note.id, 'title': note.title,
+             'text': note.text, 'slug': slug}
+            for note, slug in zip(notes, slugs[1:] + slugs[:1])
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for note in notes:
+            note.refresh_from_db()
+        self.assertEqual(
+            [note.slug for note in notes], slugs[1:] + slugs[:1]
+        )
+
+    def test_invalid_batch(self):
+        """Пакет с ошибкой не применяется, ошибки видны по операциям."""
+        initial_count = Note.objects.count()
+        response = self.post_batch(self.reader_client, [
+            {'op': 'create', 'title': self.NEW_TITLE, 'text': 'Текст'},
+            {'op': 'create', 'title': self.NEW_TITLE, 'text': 'Текст',
+             'slug': self.NOTE_SLUG},
+            {'op': 'delete', 'id': self.note.id},
+            {'op': 'create', 'title': self.NEW_TITLE},
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        errors = response.json()['results']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {'slug': [self.NOTE_SLUG + WARNING]})
+        self.assertIn('id', errors[2])
+        self.assertIn('text', errors[3])
+        self.assertEqual(Note.objects.count(), initial_count)
+
+
+class TestSlowQueryLog(BaseTestCase):
+
+    def test_slow_queries_logged(self):
+        """Медленные запросы пишутся в журнал с планом и попадают в сводку."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'queries.ndjson'
+            with self.settings(
+                SLOW_QUERY_LOG_FILE=str(path), SLOW_QUERY_THRESHOLD_MS=0
+            ):
+                client = Client()
+                client.force_login(self.author)
+                client.get(self.urls['list'])
+                stdout = StringIO()
+                call_command('querylog_report', stdout=stdout)
+            entries = [
+                json.loads(line) for line in path.read_text().splitlines()
+            ]
+        list_entries = [
+            entry for entry in entries if entry['url_name'] == 'notes:list'
+        ]
+        self.assertTrue(list_entries)
+        self.assertTrue(all(
+            entry['view'] == 'NotesList' and entry['plan']
+            for entry in list_entries
+        ))
+        self.assertIn('notes:list (NotesList)', stdout.getvalue())
+
+
+class TestWarmUp(BaseTestCase):
+
+    def test_warm_up_compiles_templates(self):
+        """После прогрева страницы рендерятся без чтения шаблонов с диска."""
+        engines['django'].engine.template_loaders[0].reset()
+        warm_up()
+        with patch.object(
+            Loader, 'get_contents', side_effect=AssertionError
+        ):
+            response = self.author_client.get(self.urls['add'])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class FakeWorkers:
+    """
+    Подменяет fork(), waitpid() и kill() главного процесса serve.
+
+    Каждый проход цикла главного процесса (его time.sleep()) самый
+    старый рабочий процесс выходит, как исчерпавший --max-requests;
+    после recycles таких выходов главный процесс получает SIGTERM.
+    """
+
+    def __init__(self, command, recycles):
+        self.command = command
+        self.recycles = recycles
+        self.started = []
+        self.exited = []
+
+    def fork(self):
+        self.started.append(1000 + len(self.started))
+        return self.started[-1]
+
+    def waitpid(self, pid, options):
+        return (self.exited.pop(0), 0) if self.exited else (0, 0)
+
+    def kill(self, pid, signum):
+        self.exited.append(pid)
+
+    def sleep(self, seconds):
+        if self.recycles:
+            self.recycles -= 1
+            self.exited.append(min(self.command.workers))
+        else:
+            self.command.signal = signal.SIGTERM
+
+
+class TestServe(BaseTestCase):
+
+    def test_serve_replaces_recycled_workers(self):
+        """Главный процесс serve запускает замену вышедшего рабочего."""
+        command = ServeCommand(stdout=StringIO(), stderr=StringIO())
+        workers = FakeWorkers(command, recycles=3)
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(METRICS_DIR=directory),
+            patch.object(serve, 'make_server') as make_server,
+            patch.object(serve, 'registry') as registry,
+            patch.object(serve.signal, 'signal'),
+            patch.object(serve.os, 'fork', workers.fork),
+            patch.object(serve.os, 'waitpid', workers.waitpid),
+            patch.object(serve.os, 'kill', workers.kill),
+            patch.object(serve.time, 'sleep', workers.sleep),
+        ):
+            make_server.return_value.server_address = ('127.0.0.1', 8000)
+            call_command(command, workers=2, preload=False)
+        self.assertEqual(workers.started, [1000, 1001, 1002, 1003, 1004])
+        self.assertEqual(registry.retire.call_count, 5)
+        self.assertEqual(command.workers, {})
+        self.assertEqual(command.failures, 0)
+
+    def test_serve_worker_stops_after_max_requests(self):
+        """Рабочий процесс serve выходит после --max-requests запросов."""
+        command = ServeCommand()
+        command.options = {
+            'preload': True, 'max_requests': 3, 'max_requests_jitter': 0,
+        }
+        command.server = Mock(handled=0)
+
+        def handle_request():
+            command.server.handled += 1
+
+        command.server.handle_request.side_effect = handle_request
+        with (
+            patch.object(serve, 'registry') as registry,
+            patch.object(serve.signal, 'signal'),
+        ):
+            command.work()
+        self.assertEqual(command.server.handled, 3)
+        registry.flush.assert_called_with()
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_serve_refuses_process_local_cache(self):
+        """С кешем в памяти процесса serve не запускает несколько процессов."""
+        with self.assertRaisesMessage(CommandError, 'default'):
+            call_command('serve', workers=2)
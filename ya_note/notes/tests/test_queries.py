@@ -0,0 +1,57 @@
+from notes.models import Note
+from .conftest import BaseTestCase, QueryBudgetMixin
+
+
+class TestQueryBudgets(QueryBudgetMixin, BaseTestCase):
+    """Бюджеты SQL-запросов страниц заметок."""
+
+    def grow_notes(self, size):
+        """Доводит число заметок автора до size."""
+        count = Note.objects.filter(author=self.author).count()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст заметки',
+                slug=f'budget-{index}',
+                author=self.author,
+            )
+            for index in range(count, size)
+        )
+
+    def test_list_budget(self):
+        """Список заметок не делает запросов на каждую заметку."""
+        self.assert_query_budget(
+            lambda: self.author_client.get(self.urls['list']),
+            3,
+            self.grow_notes,
+        )
+
+    def test_search_budget(self):
+        """Поиск укладывается в бюджет при любом числе совпадений."""
+        self.assert_query_budget(
+            lambda: self.author_client.get(
+                self.urls['search'], {'q': 'заметка'}
+            ),
+            4,
+            self.grow_notes,
+        )
+
+    def test_batch_budget(self):
+        """Пакет из многих операций выполняется постоянным числом запросов."""
+        def batch():
+            operations = [
+                {'op': 'create', 'title': 'Пакет', 'text': 'Текст'}
+                for _ in range(self.batch_size)
+            ]
+            self.author_client.post(
+                self.urls['batch'],
+                data={'operations': operations},
+                content_type='application/json',
+            )
+
+        def grow(size):
+            self.batch_size = size
+
+        # bulk_create на SQLite режет вставку на пачки по ~250 строк,
+        # поэтому размеры пакета берутся в пределах одной пачки.
+        self.assert_query_budget(batch, 6, grow, sizes=(1, 100, 200))
@@ -1,7 +1,24 @@
+import gzip
+import json
+import tempfile
 from http import HTTPStatus
+from http.cookies import SimpleCookie
+from pathlib import Path
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.templatetags.static import static
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from notes.models import Note
+from yacore.auth_cache import CachedAuthenticationMiddleware
+from yacore.metrics import SECONDS_BUCKETS, Histogram, registry
 from .conftest import BaseTestCase
 
 User = get_user_model()
@@ -67,3 +84,149 @@ class TestRoutes(BaseTestCase):
                 redirect_url = f'{self.urls["login"]}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+@override_settings(
+    AUTH_USER_CACHE=True,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    MIDDLEWARE=[
+        'yacore.auth_cache.CachedAuthenticationMiddleware'
+        if name == 'django.contrib.auth.middleware.AuthenticationMiddleware'
+        else name
+        for name in settings.MIDDLEWARE
+    ],
+)
+class TestCachedAuth(BaseTestCase):
+    """Тестирование кеширования сессии и пользователя."""
+
+    def test_no_auth_queries(self):
+        """Повторный запрос авторизованного не читает сессию и пользователя."""
+        self.author_client.get(self.urls['list'])
+        with CaptureQueriesContext(connection) as context:
+            response = self.author_client.get(self.urls['list'])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('FROM "django_session"', query['sql'])
+                self.assertNotIn('FROM "auth_user"', query['sql'])
+
+    def test_logout(self):
+        """После выхода прежняя сессионная кука больше не действует."""
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.urls['list'])
+        replay = Client()
+        replay.cookies = SimpleCookie(client.cookies)
+        client.post(reverse('users:logout'))
+        response = replay.get(self.urls['list'])
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_requires_shared_cache(self):
+        """Кеш пользователя не включается с кешем в памяти процесса."""
+        with self.assertRaises(ImproperlyConfigured):
+            CachedAuthenticationMiddleware(lambda request: None)
+
+    def test_user_update(self):
+        """Изменённый пользователь не берётся из кеша."""
+        self.author_client.get(self.urls['list'])
+        self.author.is_active = False
+        self.author.save()
+        response = self.author_client.get(self.urls['list'])
+        redirect_url = f'{self.urls["login"]}?next={self.urls["list"]}'
+        self.assertRedirects(response, redirect_url)
+
+
+class TestMetrics(BaseTestCase):
+    """Тестирование Server-Timing и метрик."""
+
+    def test_server_timing(self):
+        """Ответ содержит разбивку времени на SQL, шаблон и остальное."""
+        response = self.author_client.get(self.urls['list'])
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    def test_metrics_staff_only(self):
+        """Гистограммы по маршрутам доступны только сотрудникам."""
+        self.author_client.get(self.urls['list'])
+        response = self.author_client.get(self.urls['metrics'])
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        staff_client = Client()
+        staff_client.force_login(
+            User.objects.create(username='Сотрудник', is_staff=True)
+        )
+        response = staff_client.get(self.urls['metrics'])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'request_duration_seconds_count{view="notes:list"}',
+            response.content.decode(),
+        )
+
+    def test_metrics_from_all_workers(self):
+        """/metrics складывает гистограммы всех рабочих процессов."""
+        staff_client = Client()
+        staff_client.force_login(
+            User.objects.create(username='Сотрудник', is_staff=True)
+        )
+        other_worker = Histogram(SECONDS_BUCKETS)
+        for _ in range(5):
+            other_worker.observe(0.01)
+        with tempfile.TemporaryDirectory() as directory, self.settings(
+            METRICS_DIR=directory
+        ):
+            registry.reset()
+            (Path(directory) / '1.json').write_text(json.dumps({
+                'request_duration_seconds': {
+                    'notes:list': other_worker.dump(),
+                },
+            }))
+            self.author_client.get(self.urls['list'])
+            registry.retire(1)
+            self.assertFalse((Path(directory) / '1.json').exists())
+            self.assertIn(
+                'request_duration_seconds_count{view="notes:list"} 6',
+                staff_client.get(self.urls['metrics']).content.decode(),
+            )
+
+
+class TestStatic(BaseTestCase):
+    """Тестирование собранной статики."""
+
+    def test_precompressed_static(self):
+        """Статика собирается с хешем в имени и отдаётся сжатой копией."""
+        with tempfile.TemporaryDirectory() as directory, self.settings(
+            STATIC_ROOT=directory
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            url = static('css/base.css')
+            self.assertNotEqual(url, '/static/css/base.css')
+            self.assertContains(self.client.get(self.urls['home']), url)
+            response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(
+                response['Cache-Control'],
+                'public, max-age=31536000, immutable',
+            )
+            self.assertEqual(
+                gzip.decompress(response.getvalue()),
+                Path(finders.find('css/base.css')).read_bytes(),
+            )
+            response.close()
+
+
+class TestCompression(BaseTestCase):
+    """Тестирование сжатия и очистки HTML."""
+
+    def test_compressed_minified_page(self):
+        """Отступы убираются, текст в <textarea> остаётся как был."""
+        text = 'Начало\n    с отступом\n        и ещё'
+        Note.objects.filter(pk=self.note.pk).update(text=text)
+        response = self.author_client.get(
+            self.urls['edit'], HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        html = gzip.decompress(response.content).decode()
+        self.assertIn(text, html)
+        self.assertNotIn('\n ', html.replace(text, ''))
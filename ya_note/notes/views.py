@@ -1,7 +1,16 @@
+import json
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
+from yacore.pagination import KeysetPaginator
+from yacore.search import fts_search
+
+from .batch import BatchError, apply_batch
 from .forms import NoteForm
 from .models import Note
 
@@ -50,10 +59,77 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя по страницам.
+
+    Текст заметок в списке не выводится, поэтому и не загружается.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        paginator = KeysetPaginator(
+            super().get_queryset().only('id', 'slug', 'title'),
+            settings.NOTES_COUNT_ON_LIST_PAGE,
+            ordering=('id',),
+        )
+        self.page = paginator.get_page(self.request.GET.get('cursor'))
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return []
+        return fts_search(
+            super().get_queryset(),
+            'notes_note_fts',
+            self.query,
+            settings.SEARCH_RESULTS_COUNT,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
+
+class NoteBatch(LoginRequiredMixin, generic.View):
+    """
+    Пакет операций над заметками одним запросом.
+
+    Принимает JSON вида {"operations": [{"op": "create", "title": ...,
+    "text": ..., "slug": ...}, {"op": "update", "id": ..., ...},
+    {"op": "delete", "id": ...}]} и применяет его одной транзакцией.
+    """
+    http_method_names = ['post']
+
+    def post(self, request):
+        try:
+            operations = json.loads(request.body)['operations']
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse(
+                {'error': 'Ожидается JSON с ключом operations.'},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        try:
+            results = apply_batch(request.user, operations)
+        except BatchError as error:
+            return JsonResponse(
+                {'error': error.message, 'results': error.errors},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        return JsonResponse({'results': results})
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class YacoreConfig(AppConfig):
+    name = 'yacore'
+    verbose_name = 'Общий код ya_news и ya_note'
+
+    def ready(self):
+        from . import signals  # noqa: F401
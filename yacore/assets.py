@@ -0,0 +1,87 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+# Имена с хешем содержимого не меняются: браузер не перепроверяет их год.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+
+
+def accepts_gzip(accept_encoding):
+    """Принимает ли клиент gzip: gzip или * с ненулевым q."""
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = '1'
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                quality = value.strip()
+        try:
+            if float(quality) > 0:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную collectstatic статику из STATIC_ROOT.
+
+    Файлы индексируются при старте: отдаётся только то, что лежит
+    в STATIC_ROOT, и на запрос не тратится проверка файловой системы.
+    Если клиент принимает gzip и рядом есть сжатая копия .gz, отдаётся
+    она. Имена из манифеста кешируются браузером надолго. Без
+    STATIC_ROOT (разработка, тесты) middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        immutable = set(staticfiles_storage.hashed_files.values())
+        self.files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name.endswith('.gz'):
+                    continue
+                content_type = mimetypes.guess_type(name)[0]
+                self.files[f'{settings.STATIC_URL}{name}'] = (
+                    path,
+                    f'{path}.gz' if f'{filename}.gz' in filenames else None,
+                    content_type or 'application/octet-stream',
+                    IMMUTABLE if name in immutable else REVALIDATE,
+                )
+
+    def __call__(self, request):
+        found = (
+            self.files.get(request.path)
+            if request.method in ('GET', 'HEAD') else None
+        )
+        if found is None:
+            return self.get_response(request)
+        path, compressed, content_type, cache_control = found
+        use_gzip = compressed and accepts_gzip(
+            request.headers.get('Accept-Encoding', '')
+        )
+        response = FileResponse(
+            open(compressed if use_gzip else path, 'rb'),
+            content_type=content_type,
+        )
+        del response['Content-Disposition']
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        if compressed:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        response['Cache-Control'] = cache_control
+        return response
@@ -0,0 +1,81 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .caches import process_local_caches
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _session_verified(request, user):
+    """Те же проверки сессии, что и в auth.get_user(), но без базы."""
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    return (
+        request.session.get(auth.BACKEND_SESSION_KEY)
+        in settings.AUTHENTICATION_BACKENDS
+        and session_hash is not None
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    )
+
+
+def get_cached_user(request):
+    """
+    Пользователь сессии из кеша, а при промахе — обычным путём.
+
+    Всё, что не проходит быструю проверку (нет в кеше, хеш пароля
+    не совпал, бэкенд отключён), разбирает auth.get_user(): он же
+    сбрасывает сессию или переходит на новый SECRET_KEY.
+    """
+    if hasattr(request, '_cached_user'):
+        return request._cached_user
+    user_id = request.session.get(auth.SESSION_KEY)
+    user = cache.get(user_cache_key(user_id)) if user_id else None
+    if user is None or not _session_verified(request, user):
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(
+                user_cache_key(user.pk), user,
+                settings.AUTH_USER_CACHE_TIMEOUT,
+            )
+    request._cached_user = user
+    return user
+
+
+async def aget_cached_user(request):
+    return await sync_to_async(get_cached_user)(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, который берёт пользователя из кеша.
+
+    Подключается настройкой AUTH_USER_CACHE. Вместе с сессиями
+    в cached_db запрос авторизованного пользователя не обращается
+    к базе за сессией и пользователем. Запись в кеше живёт
+    AUTH_USER_CACHE_TIMEOUT секунд и сбрасывается при выходе и любом
+    сохранении или удалении пользователя, в том числе при смене пароля
+    (см. yacore.signals).
+    """
+
+    def __init__(self, get_response):
+        if 'default' in process_local_caches():
+            raise ImproperlyConfigured(
+                'Кешу пользователя сессии нужен кеш, общий для всех '
+                'процессов: иначе выход и смена пароля сбросят запись '
+                'только в одном из них.'
+            )
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+        request.auser = partial(aget_cached_user, request)
@@ -0,0 +1,13 @@
+from django.conf import settings
+
+# Кеши, содержимое которых у каждого процесса своё: запись или сброс
+# в одном процессе не видны остальным.
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def process_local_caches():
+    """Псевдонимы кешей из CACHES, которые живут в памяти процесса."""
+    return [
+        alias for alias, options in settings.CACHES.items()
+        if options['BACKEND'] in PROCESS_LOCAL_CACHES
+    ]
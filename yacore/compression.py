@@ -0,0 +1,139 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+# Пробелы с переводом строки — отступы шаблонов. Перевод строки
+# остаётся: он значим во встроенных скриптах.
+INDENT = re.compile(rb'\s*\n\s*')
+VERBATIM = re.compile(rb'<(/?)(pre|textarea)\b', re.IGNORECASE)
+
+
+class WhitespaceMinifier:
+    """
+    Убирает отступы из HTML, не трогая содержимое <pre> и <textarea>.
+
+    Принимает документ частями: состояние «внутри pre/textarea»
+    переходит из одной части в другую.
+    """
+
+    def __init__(self):
+        self.verbatim = None
+
+    def feed(self, data):
+        parts = []
+        start = 0
+        for match in VERBATIM.finditer(data):
+            closing, tag = match.group(1), match.group(2).lower()
+            if self.verbatim is None and not closing:
+                parts.append(INDENT.sub(b'\n', data[start:match.start()]))
+                start = match.start()
+                self.verbatim = tag
+            elif closing and self.verbatim == tag:
+                parts.append(data[start:match.start()])
+                start = match.start()
+                self.verbatim = None
+        rest = data[start:]
+        parts.append(rest if self.verbatim else INDENT.sub(b'\n', rest))
+        return b''.join(parts)
+
+
+def minify_chunks(chunks):
+    """
+    Потоковый вариант: каждая часть обрабатывается до последнего «<»,
+    чтобы тег <pre> или <textarea> не разрезало между частями.
+    """
+    minifier = WhitespaceMinifier()
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind(b'<')
+        if cut > 0:
+            yield minifier.feed(pending[:cut])
+            pending = pending[cut:]
+    if pending:
+        yield minifier.feed(pending)
+
+
+async def aminify_chunks(chunks):
+    minifier = WhitespaceMinifier()
+    pending = b''
+    async for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind(b'<')
+        if cut > 0:
+            yield minifier.feed(pending[:cut])
+            pending = pending[cut:]
+    if pending:
+        yield minifier.feed(pending)
+
+
+def minify_response(response):
+    """
+    Очищает HTML готового ответа и помечает его как очищенный.
+
+    Кеш страниц вызывает её до сохранения ответа, чтобы
+    HtmlMinifyMiddleware не очищала страницу из кеша при каждой выдаче.
+    """
+    response.content = WhitespaceMinifier().feed(response.content)
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+    response.minified = True
+    return response
+
+
+class HtmlMinifyMiddleware:
+    """
+    Убирает отступы шаблонов из HTML-ответов, в том числе потоковых.
+
+    Стоит ниже CompressionMiddleware: сжимается уже очищенный HTML.
+    Ответы, уже прошедшие minify_response(), не трогает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not response.get('Content-Type', '').startswith('text/html')
+            or response.has_header('Content-Encoding')
+            or getattr(response, 'minified', False)
+        ):
+            return response
+        if not response.streaming:
+            return minify_response(response)
+        if response.is_async:
+            response.streaming_content = aminify_chunks(
+                response.streaming_content
+            )
+        else:
+            response.streaming_content = minify_chunks(
+                response.streaming_content
+            )
+        del response['Content-Length']
+        return response
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip()
+    return media_type.startswith('text/') or media_type.endswith(
+        ('json', 'xml', 'javascript')
+    )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware только для текстовых ответов от COMPRESS_MIN_LENGTH
+    байт: меньшие ответы почти не сжимаются, а картинки и архивы
+    уже сжаты. Потоковые ответы сжимаются по частям. Против BREACH
+    GZipMiddleware добавляет в заголовок gzip случайные байты.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response.get('Content-Type', '')) or (
+            not response.streaming
+            and len(response.content) < settings.COMPRESS_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
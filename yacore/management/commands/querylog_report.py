@@ -0,0 +1,98 @@
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Списки IN разной длины — один и тот же запрос.
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def read_entries(path):
+    """Записи журнала вместе с копиями после ротации: .N, …, .1, основной."""
+    rotated = sorted(
+        (
+            candidate for candidate in path.parent.glob(f'{path.name}.*')
+            if candidate.suffix[1:].isdigit()
+        ),
+        key=lambda candidate: -int(candidate.suffix[1:]),
+    )
+    for log_path in [*rotated, path]:
+        if not log_path.exists():
+            continue
+        with open(log_path, encoding='utf-8') as log:
+            for line in log:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def is_full_scan(plan):
+    """План, в котором SQLite перебирает таблицу целиком, без индекса."""
+    return any(
+        step.startswith('SCAN ') and ' USING ' not in step for step in plan
+    )
+
+
+class Command(BaseCommand):
+    help = 'Самые дорогие запросы из журнала медленных SQL-запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            help='Журнал; по умолчанию SLOW_QUERY_LOG_FILE.',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько запросов показать.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.SLOW_QUERY_LOG_FILE
+        if not path:
+            raise CommandError(
+                'Укажите файл журнала или настройку SLOW_QUERY_LOG_FILE.'
+            )
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0.0, 'max': 0.0,
+            'views': Counter(), 'plan': [],
+        })
+        sampled = []
+        for entry in read_entries(Path(path)):
+            if not entry['slow']:
+                sampled.append(entry['duration_ms'])
+                continue
+            group = groups[IN_LIST.sub('IN (...)', entry['sql'])]
+            group['count'] += 1
+            group['total'] += entry['duration_ms']
+            group['max'] = max(group['max'], entry['duration_ms'])
+            group['views'][
+                f'{entry["url_name"]} ({entry["view"]})'
+            ] += 1
+            group['plan'] = entry.get('plan') or group['plan']
+        self.stdout.write(
+            f'Медленных запросов: {sum(g["count"] for g in groups.values())}'
+            f', разных: {len(groups)}. Выборка обычных: {len(sampled)}'
+            + (
+                f', в среднем {sum(sampled) / len(sampled):.1f} мс.'
+                if sampled else '.'
+            )
+        )
+        worst = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True
+        )[:options['limit']]
+        for number, (sql, group) in enumerate(worst, start=1):
+            scan = ', полный просмотр' if is_full_scan(group['plan']) else ''
+            self.stdout.write(
+                f'\n{number}. {group["count"]} раз, всего '
+                f'{group["total"]:.1f} мс, макс. {group["max"]:.1f} мс{scan}'
+            )
+            views = ', '.join(
+                f'{view} ×{count}'
+                for view, count in group['views'].most_common()
+            )
+            self.stdout.write(f'   Где: {views}')
+            self.stdout.write(f'   SQL: {sql}')
+            for step in group['plan']:
+                self.stdout.write(f'   План: {step}')
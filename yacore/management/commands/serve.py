@@ -0,0 +1,281 @@
+import argparse
+import gc
+import os
+import random
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    WSGIRequestHandler, WSGIServer, get_internal_wsgi_application
+)
+from django.db import connections
+
+from yacore.caches import process_local_caches
+from yacore.metrics import registry
+
+# Задержка перед новым рабочим процессом после падений подряд
+# удваивается от BACKOFF_START до BACKOFF_MAX секунд. Процесс,
+# проработавший STABLE_AFTER секунд, сбрасывает счётчик падений.
+BACKOFF_START = 0.1
+BACKOFF_MAX = 30
+STABLE_AFTER = 10
+
+
+class PreforkServer(WSGIServer):
+    """
+    Однопоточный WSGI-сервер рабочего процесса.
+
+    Слушающий сокет общий для всех рабочих процессов и неблокирующий:
+    соединение достаётся тому, кто первым вызвал accept(), остальные
+    получают BlockingIOError и возвращаются к select().
+    """
+
+    request_queue_size = 128
+    timeout = 1
+    handled = 0
+
+    def process_request(self, request, client_address):
+        self.handled += 1
+        super().process_request(request, client_address)
+
+
+def parse_bind(bind):
+    host, _, port = bind.rpartition(':')
+    if not host or not port.isdigit():
+        raise CommandError(f'Адрес должен быть вида host:port, а не {bind}.')
+    return host, int(port)
+
+
+def make_server(address, fd):
+    """Сервер на новом сокете или на сокете, унаследованном при reload."""
+    server = PreforkServer(
+        address, WSGIRequestHandler, bind_and_activate=fd is None
+    )
+    if fd is not None:
+        server.socket.close()
+        server.socket = socket.socket(fileno=fd)
+        host, port = server.socket.getsockname()[:2]
+        server.server_address = (host, port)
+        server.server_name = socket.getfqdn(host)
+        server.server_port = port
+        server.setup_environ()
+    server.socket.setblocking(False)
+    os.set_inheritable(server.socket.fileno(), True)
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает приложение в нескольких рабочих процессах. Главный '
+        'процесс один раз импортирует и прогревает приложение, замораживает '
+        'сборщик мусора и порождает рабочие процессы через fork(): '
+        'их память делится с главным по copy-on-write. SIGHUP — плавный '
+        'перезапуск с новым кодом, SIGTERM и SIGINT — остановка.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1:8000')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='Перезапуск рабочего процесса после стольких запросов; '
+                 '0 — без перезапуска.',
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=50,
+            help='Случайная добавка к --max-requests, чтобы процессы '
+                 'не перезапускались одновременно.',
+        )
+        parser.add_argument(
+            '--graceful-timeout', type=float, default=30,
+            help='Сколько секунд ждать текущие запросы при остановке.',
+        )
+        parser.add_argument(
+            '--no-preload', action='store_false', dest='preload',
+            help='Импортировать приложение в каждом рабочем процессе.',
+        )
+        parser.add_argument(
+            '--no-freeze', action='store_false', dest='freeze',
+            help='Не вызывать gc.freeze() перед fork().',
+        )
+        parser.add_argument(
+            '--fd', type=int, help='Сокет от прежнего главного процесса.'
+        )
+        parser.add_argument('--metrics-dir', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        local = process_local_caches()
+        if options['workers'] > 1 and local:
+            raise CommandError(
+                f'Кеши {", ".join(local)} у каждого процесса свои: '
+                'сброс записей в одном рабочем процессе не увидят '
+                'остальные. Настройте общий кеш или запустите '
+                '--workers 1.'
+            )
+        self.options = options
+        self.prepare_metrics()
+        self.server = make_server(parse_bind(options['bind']), options['fd'])
+        if options['preload']:
+            self.server.set_app(get_internal_wsgi_application())
+            connections.close_all()
+            if options['freeze']:
+                gc.collect()
+                gc.freeze()
+        self.workers = {}
+        self.failures = 0
+        self.spawn_after = 0
+        self.signal = None
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.remember_signal)
+        host, port = self.server.server_address
+        self.stdout.write(
+            f'Главный процесс {os.getpid()} слушает http://{host}:{port}/, '
+            f'рабочих процессов: {options["workers"]}'
+        )
+        self.stdout.flush()
+        while self.signal is None:
+            self.reap()
+            while (
+                len(self.workers) < options['workers']
+                and time.monotonic() >= self.spawn_after
+            ):
+                self.spawn()
+            time.sleep(0.1)
+        self.stop_workers()
+        if self.signal == signal.SIGHUP:
+            self.reload()
+        if self.temporary_metrics:
+            shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+
+    def prepare_metrics(self):
+        """
+        Каталог, через который /metrics складывает гистограммы рабочих
+        процессов (см. yacore.metrics.Registry).
+
+        Без METRICS_DIR создаётся временный каталог, и при SIGHUP новый
+        главный процесс получает его через --metrics-dir. При обычном
+        запуске данные прошлого запуска удаляются: их PID могут
+        достаться новым рабочим процессам.
+        """
+        self.temporary_metrics = settings.METRICS_DIR is None
+        directory = self.options['metrics_dir'] or settings.METRICS_DIR
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='metrics-')
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.options['fd'] is None:
+            for path in directory.glob('*.json'):
+                path.unlink()
+        settings.METRICS_DIR = str(directory)
+
+    def remember_signal(self, signum, frame):
+        self.signal = signum
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        status = 0
+        try:
+            self.work()
+        except BaseException:
+            status = 1
+            self.stderr.write(f'Рабочий процесс {os.getpid()} упал:')
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def reap(self):
+        """Забирает завершившиеся рабочие процессы, их место займут новые."""
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                return
+            started = self.workers.pop(pid, None)
+            registry.retire(pid)
+            if os.waitstatus_to_exitcode(status):
+                self.crashed(pid, started)
+
+    def crashed(self, pid, started):
+        """
+        Откладывает запуск замены: процесс, падающий при старте,
+        не перезапускается в бесконечном цикле.
+        """
+        now = time.monotonic()
+        if started is not None and now - started >= STABLE_AFTER:
+            self.failures = 0
+        delay = min(BACKOFF_MAX, BACKOFF_START * 2 ** self.failures)
+        self.failures += 1
+        self.spawn_after = now + delay
+        self.stderr.write(
+            f'Рабочий процесс {pid} завершился с ошибкой, '
+            f'следующий запуск через {delay:.1f} с.'
+        )
+
+    def work(self):
+        """Цикл рабочего процесса до сигнала или лимита запросов."""
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        random.seed()
+        if not self.options['preload']:
+            self.server.set_app(get_internal_wsgi_application())
+        limit = self.options['max_requests']
+        if limit:
+            limit += random.randint(0, self.options['max_requests_jitter'])
+        registry.reset()
+        try:
+            while not stopping and not (
+                limit and self.server.handled >= limit
+            ):
+                self.server.handle_request()
+                registry.flush(force=False)
+        finally:
+            registry.flush()
+
+    def stop_workers(self):
+        """SIGTERM рабочим: дообслужить текущий запрос и выйти."""
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.options['graceful_timeout']
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            registry.retire(pid)
+        self.workers.clear()
+
+    def reload(self):
+        """
+        Новый главный процесс с тем же сокетом: соединения, пришедшие
+        во время перезапуска, ждут в очереди сокета, а не отклоняются.
+        """
+        argv = [
+            arg for arg in sys.argv
+            if not arg.startswith(('--fd', '--metrics-dir'))
+        ]
+        argv.append(f'--fd={self.server.socket.fileno()}')
+        if self.temporary_metrics:
+            argv.append(f'--metrics-dir={settings.METRICS_DIR}')
+        self.stdout.write(f'Перезапуск главного процесса {os.getpid()}')
+        self.stdout.flush()
+        os.execv(sys.executable, [sys.executable, *argv])
@@ -0,0 +1,217 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import HttpResponse
+from django.views import generic
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Имя метрики: (описание, границы корзин).
+METRICS = {
+    'request_duration_seconds': (
+        'Полное время обработки запроса.', SECONDS_BUCKETS
+    ),
+    'db_duration_seconds': (
+        'Время SQL-запросов за запрос.', SECONDS_BUCKETS
+    ),
+    'template_duration_seconds': (
+        'Время рендера шаблона без SQL, выполненного при рендере.',
+        SECONDS_BUCKETS,
+    ),
+    'db_queries': ('Число SQL-запросов за запрос.', QUERIES_BUCKETS),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами, как в Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def dump(self):
+        return {'counts': self.counts, 'sum': self.sum, 'count': self.count}
+
+    def merge(self, data):
+        self.counts = [a + b for a, b in zip(self.counts, data['counts'])]
+        self.sum += data['sum']
+        self.count += data['count']
+
+    def lines(self, name, view):
+        cumulative = 0
+        bounds = [*map(str, self.buckets), '+Inf']
+        for bound, count in zip(bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{view="{view}"}} {self.sum}'
+        yield f'{name}_count{{view="{view}"}} {self.count}'
+
+
+def empty_histograms():
+    return {
+        name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+        for name, (_, buckets) in METRICS.items()
+    }
+
+
+def merge_histograms(histograms, data):
+    for name, views in data.items():
+        if name in histograms:
+            for view, histogram in views.items():
+                histograms[name][view].merge(histogram)
+
+
+def dump_histograms(histograms):
+    return {
+        name: {view: histogram.dump() for view, histogram in views.items()}
+        for name, views in histograms.items()
+    }
+
+
+def write_json(path, data):
+    """Запись целиком или никак: читатель не увидит половину файла."""
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_text(json.dumps(data))
+    os.replace(temporary, path)
+
+
+@contextmanager
+def locked(directory, operation):
+    with open(directory / '.lock', 'a') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+class Registry:
+    """
+    Гистограммы METRICS по имени маршрута.
+
+    Каждый процесс копит данные в памяти. Если задан METRICS_DIR (его
+    создаёт команда serve), процесс не чаще раза в FLUSH_INTERVAL секунд
+    сохраняет их в METRICS_DIR/<pid>.json, а /metrics складывает файлы
+    всех рабочих процессов: запрос к Prometheus попадает в случайный
+    процесс, и без этого счётчики скакали бы от процесса к процессу.
+    Данные завершившихся процессов главный процесс переносит в
+    retired.json (retire()), чтобы счётчики не убывали.
+    """
+
+    FLUSH_INTERVAL = 1
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = empty_histograms()
+            self.flushed = 0
+            self.pending = False
+
+    @staticmethod
+    def directory():
+        return settings.METRICS_DIR and Path(settings.METRICS_DIR)
+
+    def observe(self, view, values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[name][view].observe(value)
+            self.pending = True
+        self.flush(force=False)
+
+    def flush(self, force=True):
+        """
+        Сохраняет данные процесса в METRICS_DIR, если он задан.
+
+        С force=False — только несохранённые данные и не чаще раза
+        в FLUSH_INTERVAL секунд; рабочий процесс serve вызывает так
+        flush() и между запросами, чтобы данные простаивающего процесса
+        тоже доходили до /metrics.
+        """
+        directory = self.directory()
+        if not directory or not force and (
+            not self.pending
+            or time.monotonic() - self.flushed < self.FLUSH_INTERVAL
+        ):
+            return
+        with self.lock:
+            self.flushed = time.monotonic()
+            self.pending = False
+            data = dump_histograms(self.histograms)
+        write_json(directory / f'{os.getpid()}.json', data)
+
+    def collect(self):
+        """Свои гистограммы или сумма по всем процессам из METRICS_DIR."""
+        directory = self.directory()
+        if not directory:
+            return self.histograms
+        self.flush()
+        histograms = empty_histograms()
+        with locked(directory, fcntl.LOCK_SH):
+            for path in directory.glob('*.json'):
+                try:
+                    merge_histograms(histograms, json.loads(path.read_text()))
+                except FileNotFoundError:
+                    continue
+        return histograms
+
+    def retire(self, pid):
+        """Переносит данные завершившегося процесса в retired.json."""
+        directory = self.directory()
+        if not directory or not (directory / f'{pid}.json').exists():
+            return
+        path = directory / f'{pid}.json'
+        retired = directory / 'retired.json'
+        with locked(directory, fcntl.LOCK_EX):
+            histograms = empty_histograms()
+            for source in (retired, path):
+                if source.exists():
+                    merge_histograms(
+                        histograms, json.loads(source.read_text())
+                    )
+            write_json(retired, dump_histograms(histograms))
+            path.unlink()
+
+    def render(self):
+        """Все гистограммы в текстовом формате Prometheus."""
+        histograms = self.collect()
+        lines = []
+        with self.lock:
+            for name, (description, _) in METRICS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histogram in sorted(histograms[name].items()):
+                    lines.extend(histogram.lines(name, view))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Metrics(UserPassesTestMixin, generic.View):
+    """Гистограммы времени запросов для Prometheus, только сотрудникам."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
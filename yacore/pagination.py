@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+@dataclass
+class KeysetPage:
+    """Страница выборки и курсор для перехода к следующей."""
+
+    object_list: object
+    next_cursor: str | None = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу сортировки вместо OFFSET.
+
+    Курсор хранит значения полей сортировки последнего объекта страницы,
+    поэтому каждая следующая страница выбирается одним запросом по индексу
+    за одинаковое время, как бы далеко ни пролистал читатель. Запрос
+    читает на одну строку больше страницы: лишняя строка означает, что
+    следующая страница есть, и отдельный запрос для проверки не нужен.
+    Последнее поле ordering должно быть уникальным (обычно это id).
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in ordering
+        ]
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу, следующую за курсором."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(cursor)))
+        return self._page(list(queryset[:self.per_page + 1]))
+
+    async def aget_page(self, cursor=None):
+        """Асинхронный вариант get_page() для async-представлений."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(cursor)))
+        return self._page(
+            [obj async for obj in queryset[:self.per_page + 1]]
+        )
+
+    def _page(self, objects):
+        """Страница из per_page + 1 прочитанных строк."""
+        if len(objects) <= self.per_page:
+            return KeysetPage(objects)
+        object_list = objects[:self.per_page]
+        return KeysetPage(object_list, self.encode(object_list[-1]))
+
+    def encode(self, obj):
+        """Упаковывает значения ключа объекта в непрозрачный курсор."""
+        raw = json.dumps(
+            [field.value_to_string(obj) for field in self.fields],
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """Распаковывает курсор; некорректный курсор даёт 404."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(raw, list) or len(raw) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, raw)
+            ]
+        except (
+            binascii.Error, UnicodeDecodeError, ValueError, ValidationError
+        ):
+            raise Http404('Некорректный курсор страницы.')
+
+    def _after(self, values):
+        """
+        Условие «строго после values» в порядке сортировки.
+
+        Для ordering (a, b, c) это a > x OR (a = x AND (b > y OR ...)),
+        с учётом направления сортировки каждого поля.
+        """
+        condition = Q()
+        for name, field, value in reversed(list(zip(
+            self.ordering, self.fields, values
+        ))):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            after = Q(**{f'{field.attname}__{lookup}': value})
+            if condition:
+                after |= Q(**{field.attname: value}) & condition
+            condition = after
+        return condition
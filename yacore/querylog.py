@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from functools import partial
+from logging.handlers import WatchedFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+querylog = logging.getLogger('querylog')
+
+
+class SlowQueryLogMiddleware:
+    """
+    Журнал медленных SQL-запросов в NDJSON.
+
+    Включается настройкой SLOW_QUERY_LOG_FILE. Запросы дольше
+    SLOW_QUERY_THRESHOLD_MS записываются всегда, вместе с планом
+    EXPLAIN QUERY PLAN, остальные — с вероятностью SLOW_QUERY_SAMPLE_RATE.
+    Каждая запись помечена именем маршрута и классом представления.
+    Сводку строит команда querylog_report.
+
+    В журнал дописывают все рабочие процессы serve, поэтому ротация
+    внешняя (logrotate): WatchedFileHandler замечает, что файл
+    переименован, и открывает новый.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG_FILE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.sample_rate = settings.SLOW_QUERY_SAMPLE_RATE
+        self.explaining = threading.local()
+        path = os.path.abspath(settings.SLOW_QUERY_LOG_FILE)
+        if not any(
+            getattr(handler, 'baseFilename', None) == path
+            for handler in querylog.handlers
+        ):
+            for handler in list(querylog.handlers):
+                querylog.removeHandler(handler)
+                handler.close()
+            handler = WatchedFileHandler(path, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            querylog.addHandler(handler)
+            querylog.setLevel(logging.INFO)
+            querylog.propagate = False
+
+    def __call__(self, request):
+        wrappers = connections[DEFAULT_DB_ALIAS].execute_wrappers
+        wrapper = partial(self.log_query, request)
+        wrappers.append(wrapper)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            wrappers.remove(wrapper)
+            raise
+        if response.streaming:
+            # Запросы потокового ответа (например, выгрузки) выполняются,
+            # пока сервер его отдаёт: обёртка снимается при закрытии.
+            response._resource_closers.append(
+                partial(wrappers.remove, wrapper)
+            )
+        else:
+            wrappers.remove(wrapper)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        request.querylog_view = getattr(view, '__name__', repr(view))
+
+    def log_query(self, request, execute, sql, params, many, context):
+        if getattr(self.explaining, 'active', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        slow = duration >= self.threshold
+        if not slow and random.random() >= self.sample_rate:
+            return result
+        match = request.resolver_match
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'url_name': match.view_name if match else None,
+            'view': getattr(request, 'querylog_view', None),
+            'duration_ms': round(duration * 1000, 3),
+            'slow': slow,
+            'sql': sql,
+        }
+        if slow:
+            entry['plan'] = self.explain(
+                context['connection'], sql, params[0] if many else params
+            )
+        querylog.info(json.dumps(entry, ensure_ascii=False))
+        return result
+
+    def explain(self, db, sql, params):
+        """План запроса; параметры в журнал не пишутся."""
+        self.explaining.active = True
+        try:
+            with db.cursor() as cursor:
+                cursor.execute(
+                    f'{db.ops.explain_query_prefix()} {sql}', params
+                )
+                return [row[-1] for row in cursor.fetchall()]
+        except DatabaseError as error:
+            return [f'EXPLAIN не удался: {error}']
+        finally:
+            self.explaining.active = False
@@ -0,0 +1,70 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(text):
+    """
+    Запрос FTS5 из пользовательского ввода.
+
+    Каждое слово берётся в кавычки, чтобы ввод не разбирался как
+    синтаксис FTS5, и ищется по префиксу — так находятся и другие формы
+    слова. Слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и размечает найденные слова тегом mark."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def fts_search(queryset, table, text, limit):
+    """
+    Полнотекстовый поиск по таблице FTS5 с ранжированием bm25.
+
+    Возвращает до limit объектов queryset в порядке релевантности
+    с атрибутом snippet — фрагментом текста с подсветкой. Если queryset
+    отфильтрован, поиск ограничивается его строками.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    sql = (
+        f'SELECT rowid, snippet({table}, -1, %s, %s, %s, %s) '
+        f'FROM {table} WHERE {table} MATCH %s'
+    )
+    params = [
+        HIGHLIGHT_START, HIGHLIGHT_END, ELLIPSIS, SNIPPET_TOKENS, match
+    ]
+    if queryset.query.where:
+        ids_sql, ids_params = queryset.order_by().values(
+            'pk'
+        ).query.sql_with_params()
+        # Унарный плюс не даёт планировщику перебирать rowid из
+        # подзапроса: иначе FTS5 заново выполняет MATCH для каждой строки.
+        sql += f' AND +rowid IN ({ids_sql})'
+        params.extend(ids_params)
+    sql += ' ORDER BY rank LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    objects = queryset.in_bulk([pk for pk, _ in rows])
+    results = []
+    for pk, snippet in rows:
+        if pk in objects:
+            objects[pk].snippet = highlight(snippet)
+            results.append(objects[pk])
+    return results
@@ -0,0 +1,39 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+# Остальное (картинки, шрифты woff2) уже сжато.
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Имена файлов с хешем содержимого и рядом сжатые копии .gz.
+
+    Пока collectstatic не запускался и манифеста нет, {% static %}
+    возвращает исходные имена: так работают разработка и тесты.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE) and self.compress(name):
+                yield name, f'{name}.gz', True
+
+    def compress(self, name):
+        """Пишет name.gz, если сжатие уменьшает файл хотя бы на 5%."""
+        with self.open(name) as original:
+            content = original.read()
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) > len(content) * 0.95:
+            return False
+        with open(self.path(f'{name}.gz'), 'wb') as target:
+            target.write(compressed)
+        return True
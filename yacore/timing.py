@@ -0,0 +1,79 @@
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import registry
+
+
+class RequestTiming:
+    """Время SQL и рендера шаблона в рамках одного запроса."""
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка execute_wrappers соединения: замер каждого запроса."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def start_render(self):
+        self.render_started = (time.perf_counter(), self.db)
+
+    def finish_render(self, response):
+        """SQL из ленивых выборок, вычисленных при рендере, не в счёт."""
+        started, db = self.render_started
+        self.template += time.perf_counter() - started - (self.db - db)
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing и гистограммы времени по маршрутам.
+
+    Стоит первым в MIDDLEWARE, чтобы total включал остальные middleware.
+    db — время и число SQL-запросов, tpl — рендер TemplateResponse без
+    SQL, app — всё остальное. Гистограммы по имени маршрута отдаёт /metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.timing = RequestTiming()
+        started = time.perf_counter()
+        # Не execute_wrapper(): он снимает последнюю обёртку в списке,
+        # а обёртка SlowQueryLogMiddleware у потокового ответа остаётся
+        # до его закрытия.
+        wrappers = connections[DEFAULT_DB_ALIAS].execute_wrappers
+        wrappers.append(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrappers.remove(timing)
+        total = time.perf_counter() - started
+        app = max(total - timing.db - timing.template, 0)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timing.db * 1000:.2f};desc="{timing.queries} SQL"',
+            f'tpl;dur={timing.template * 1000:.2f}',
+            f'app;dur={app * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        match = request.resolver_match
+        registry.observe(match.view_name if match else 'unresolved', {
+            'request_duration_seconds': total,
+            'db_duration_seconds': timing.db,
+            'template_duration_seconds': timing.template,
+            'db_queries': timing.queries,
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        request.timing.start_render()
+        response.add_post_render_callback(request.timing.finish_render)
+        return response
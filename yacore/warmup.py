@@ -0,0 +1,83 @@
+import logging
+import time
+from pathlib import Path
+
+from django.forms.renderers import get_default_renderer
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def loader_dirs(backend):
+    """Каталоги всех загрузчиков движка, в том числе внутри cached."""
+    return [
+        directory
+        for loader in backend.engine.template_loaders
+        if hasattr(loader, 'get_dirs')
+        for directory in loader.get_dirs()
+    ]
+
+
+def template_names(directories, prefix=''):
+    """Имена всех шаблонов в каталогах загрузчиков, без повторов."""
+    names = set()
+    for directory in map(Path, directories):
+        for path in directory.rglob('*'):
+            name = path.relative_to(directory).as_posix()
+            if (
+                path.is_file() and path.suffix in TEMPLATE_SUFFIXES
+                and name.startswith(prefix)
+            ):
+                names.add(name)
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Компилирует шаблоны в кеш загрузчиков.
+
+    Родители {% extends %} и {% include %} с постоянным именем — тоже
+    шаблоны из этих каталогов, поэтому при рендере они уже в кеше.
+    У форм свой движок: из него берутся только шаблоны django/forms.
+    """
+    count = 0
+    for engine in engines.all():
+        for name in template_names(loader_dirs(engine)):
+            engine.get_template(name)
+            count += 1
+    forms = get_default_renderer().engine
+    for name in template_names(loader_dirs(forms), 'django/forms/'):
+        forms.get_template(name)
+        count += 1
+    return count
+
+
+def warm_urls(resolver=None):
+    """
+    Импортирует все URLconf вместе с представлениями и заполняет
+    таблицы reverse() и регулярные выражения маршрутов.
+    """
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def warm_up():
+    """Прогрев процесса до приёма запросов: вызывается из wsgi и asgi."""
+    started = time.perf_counter()
+    urls = warm_urls()
+    templates = warm_templates()
+    logger.info(
+        'Прогрев: %d маршрутов, %d шаблонов за %.0f мс',
+        urls, templates, (time.perf_counter() - started) * 1000,
+    )